@@ -1 +1,5 @@
-# core/__init__.py# File vuoto - serve per rendere core un package Python# api/__init__.py  # File vuoto - serve per rendere api un package Python
\ No newline at end of file
+# core/__init__.py
+# File vuoto - serve per rendere core un package Python
+
+# api/__init__.py  
+# File vuoto - serve per rendere api un package Python
\ No newline at end of file
@@ -1,36 +1,69 @@
 from django.contrib import admin
-from .models import Company, Technician, Customer, ServiceType, WorkOrder, Expense
+from .models import Company, Technician, Customer, ServiceType, WorkOrder, WorkOrderSequence, TechnicianDailyStats, Expense, WORK_ORDER_TEXT_FIELDS
+
+class ListDeferMixin:
+    """Nella lista non carica le colonne di testo lunghe indicate in list_defer"""
+    list_defer = ()
+    
+    def get_queryset(self, request):
+        queryset = super().get_queryset(request)
+        match = request.resolver_match
+        if self.list_defer and match and match.url_name and match.url_name.endswith('_changelist'):
+            queryset = queryset.defer(*self.list_defer)
+        return queryset
 
 @admin.register(Company)
-class CompanyAdmin(admin.ModelAdmin):
+class CompanyAdmin(ListDeferMixin, admin.ModelAdmin):
     list_display = ['name', 'owner', 'phone', 'created_at']
+    list_select_related = ['owner']
+    list_defer = ['address']
     search_fields = ['name', 'owner__username']
 
 @admin.register(Technician)
 class TechnicianAdmin(admin.ModelAdmin):
     list_display = ['user', 'company', 'phone', 'vehicle_plate', 'is_active']
+    list_select_related = ['user', 'company']
     list_filter = ['company', 'is_active']
     search_fields = ['user__first_name', 'user__last_name', 'phone']
 
 @admin.register(Customer)
-class CustomerAdmin(admin.ModelAdmin):
+class CustomerAdmin(ListDeferMixin, admin.ModelAdmin):
     list_display = ['name', 'company', 'phone', 'created_at']
+    list_select_related = ['company']
+    list_defer = ['address', 'notes']
     list_filter = ['company']
     search_fields = ['name', 'phone', 'email']
 
 @admin.register(ServiceType)
-class ServiceTypeAdmin(admin.ModelAdmin):
+class ServiceTypeAdmin(ListDeferMixin, admin.ModelAdmin):
     list_display = ['name', 'company', 'estimated_duration_minutes', 'default_price']
+    list_select_related = ['company']
+    list_defer = ['description']
     list_filter = ['company']
 
 @admin.register(WorkOrder)
-class WorkOrderAdmin(admin.ModelAdmin):
+class WorkOrderAdmin(ListDeferMixin, admin.ModelAdmin):
     list_display = ['order_number', 'title', 'customer', 'technician', 'status', 'priority', 'created_at']
+    list_select_related = ['customer__company', 'technician__user', 'technician__company']
+    list_defer = WORK_ORDER_TEXT_FIELDS
     list_filter = ['status', 'priority', 'company', 'created_at']
     search_fields = ['order_number', 'title', 'customer__name']
     readonly_fields = ['order_number', 'created_at']
 
+@admin.register(WorkOrderSequence)
+class WorkOrderSequenceAdmin(admin.ModelAdmin):
+    list_display = ['company', 'year', 'last_number']
+    list_select_related = ['company']
+    list_filter = ['year']
+
+@admin.register(TechnicianDailyStats)
+class TechnicianDailyStatsAdmin(admin.ModelAdmin):
+    list_display = ['technician', 'date', 'total', 'completed', 'cancelled']
+    list_select_related = ['technician__user', 'technician__company']
+    list_filter = ['date']
+
 @admin.register(Expense)
 class ExpenseAdmin(admin.ModelAdmin):
     list_display = ['work_order', 'technician', 'expense_type', 'amount', 'created_at']
+    list_select_related = ['work_order', 'technician__user', 'technician__company']
     list_filter = ['expense_type', 'created_at']
\ No newline at end of file
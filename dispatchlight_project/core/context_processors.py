@@ -0,0 +1,6 @@
+# core/context_processors.py - Variabili comuni a tutti i template
+from .mixins import get_session_role, ROLE_OWNER
+
+def user_role(request):
+    """Ruolo dell'utente dalla sessione: la navbar non interroga il DB"""
+    return {'is_owner': get_session_role(request) == ROLE_OWNER}
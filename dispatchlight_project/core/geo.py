@@ -0,0 +1,173 @@
+# core/geo.py - Calcolo distanze per il dispatch dei tecnici
+from functools import lru_cache
+from hashlib import blake2b
+from math import radians, sin, cos, sqrt, atan2, hypot
+
+# NumPy è opzionale: senza, si usa il calcolo scalare
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# scikit-learn è opzionale: senza, l'indice spaziale ricade sulla ricerca lineare
+try:
+    from sklearn.neighbors import BallTree
+except ImportError:
+    BallTree = None
+
+EARTH_RADIUS_KM = 6371  # Raggio Terra in km
+
+# Approssimazione equirettangolare ("cheap ruler") per distanze urbane
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LNG_EQUATOR = 111.320
+CHEAP_RULER_MAX_DEGREES = 3  # Oltre ~300 km si torna alla haversine
+
+# Centro delle coordinate simulate (Roma) finché manca un geocoding reale
+DEMO_CENTER_LAT = 41.9028
+DEMO_CENTER_LNG = 12.4964
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Distanza in km tra due coordinate (formula di haversine)"""
+    lat1, lng1, lat2, lng2 = map(radians, [lat1, lng1, lat2, lng2])
+
+    dlat = lat2 - lat1
+    dlng = lng2 - lng1
+
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlng/2)**2
+    c = 2 * atan2(sqrt(a), sqrt(1-a))
+
+    return EARTH_RADIUS_KM * c
+
+def bulk_haversine_km(lat, lng, latitudes, longitudes):
+    """
+    Distanze in km da (lat, lng) verso una sequenza di coordinate.
+    Con NumPy il calcolo avviene in un'unica passata vettoriale.
+    """
+    if np is None:
+        return [haversine_km(lat, lng, la, ln) for la, ln in zip(latitudes, longitudes)]
+
+    lat_r = np.radians(lat)
+    lng_r = np.radians(lng)
+    lat2 = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lng2 = np.radians(np.asarray(longitudes, dtype=np.float64))
+
+    dlat = lat2 - lat_r
+    dlng = lng2 - lng_r
+
+    a = np.sin(dlat * 0.5)**2 + np.cos(lat_r) * np.cos(lat2) * np.sin(dlng * 0.5)**2
+    return 2 * EARTH_RADIUS_KM * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+def cheap_ruler(lat):
+    """Fattori (km per grado di longitudine, km per grado di latitudine) attorno a lat"""
+    return KM_PER_DEGREE_LNG_EQUATOR * cos(radians(lat)), KM_PER_DEGREE_LAT
+
+def cheap_distance_km(lat1, lng1, lat2, lng2, ruler=None):
+    """
+    Distanza in km con l'approssimazione equirettangolare.
+    Precisa entro poche centinaia di km; oltre usa la haversine.
+    Passare ruler=cheap_ruler(lat1) per riusarlo su più punti.
+    """
+    if abs(lat2 - lat1) > CHEAP_RULER_MAX_DEGREES or abs(lng2 - lng1) > CHEAP_RULER_MAX_DEGREES:
+        return haversine_km(lat1, lng1, lat2, lng2)
+
+    kx, ky = ruler or cheap_ruler(lat1)
+    return hypot((lng2 - lng1) * kx, (lat2 - lat1) * ky)
+
+def bulk_cheap_distance_km(lat, lng, latitudes, longitudes):
+    """Distanze in km da (lat, lng) con l'approssimazione equirettangolare"""
+    ruler = cheap_ruler(lat)
+
+    if np is None:
+        return [cheap_distance_km(lat, lng, float(la), float(ln), ruler) for la, ln in zip(latitudes, longitudes)]
+
+    latitudes = np.asarray(latitudes, dtype=np.float64)
+    longitudes = np.asarray(longitudes, dtype=np.float64)
+    dlat = latitudes - lat
+    dlng = longitudes - lng
+
+    distances = np.hypot(dlng * ruler[0], dlat * ruler[1])
+
+    far = (np.abs(dlat) > CHEAP_RULER_MAX_DEGREES) | (np.abs(dlng) > CHEAP_RULER_MAX_DEGREES)
+    if far.any():
+        distances[far] = bulk_haversine_km(lat, lng, latitudes[far], longitudes[far])
+    return distances
+
+def demo_technician_coordinates(technician_id):
+    """
+    Coordinate simulate (entro ±0.1°) e stabili per un tecnico, per la demo.
+    Hash moltiplicativo di Knuth sull'id: nessuno stato globale come con random.seed().
+    In produzione sostituire con current_latitude/current_longitude.
+    """
+    hash_int = (technician_id * 2654435761) % 2**32
+
+    lat_offset = ((hash_int % 200) - 100) / 1000
+    lng_offset = (((hash_int >> 16) % 200) - 100) / 1000
+
+    return DEMO_CENTER_LAT + lat_offset, DEMO_CENTER_LNG + lng_offset
+
+@lru_cache(maxsize=10000)
+def demo_address_coordinates(address):
+    """
+    Coordinate simulate (entro ±0.1°) e stabili per un indirizzo, per la demo.
+    In produzione sostituire con un geocoding reale (Google Maps o simili).
+    """
+    hash_int = int.from_bytes(blake2b(address.encode(), digest_size=8).digest(), 'little')
+
+    lat_offset = ((hash_int % 200) - 100) / 1000
+    lng_offset = (((hash_int // 200) % 200) - 100) / 1000
+
+    return DEMO_CENTER_LAT + lat_offset, DEMO_CENTER_LNG + lng_offset
+
+class SpatialIndex:
+    """
+    Indice spaziale in memoria su un insieme di punti (id, lat, lng).
+    Con scikit-learn usa un BallTree haversine (ricerca logaritmica),
+    altrimenti calcola le distanze in blocco su tutti i punti.
+    Le distanze restituite, usate per l'ordinamento del dispatch, sono sempre
+    quelle dell'approssimazione equirettangolare: il BallTree seleziona solo i candidati.
+    """
+
+    def __init__(self, ids, latitudes, longitudes):
+        self.ids = list(ids)
+        self.latitudes = [float(lat) for lat in latitudes]
+        self.longitudes = [float(lng) for lng in longitudes]
+        self.tree = None
+        if BallTree is not None and np is not None and self.ids:
+            points = np.radians(np.column_stack([self.latitudes, self.longitudes]))
+            self.tree = BallTree(points, metric='haversine')
+
+    def nearest(self, lat, lng, k=5):
+        """I k punti più vicini come lista [(id, km)], dal più vicino"""
+        k = min(k, len(self.ids))
+        if not k:
+            return []
+
+        if self.tree is not None:
+            indexes = self.tree.query(np.radians([[lat, lng]]), k=k, return_distance=False)[0]
+            return sorted(self._cheap_distances(lat, lng, indexes).items(), key=lambda item: item[1])
+
+        distances = bulk_cheap_distance_km(lat, lng, self.latitudes, self.longitudes)
+        return sorted(zip(self.ids, map(float, distances)), key=lambda item: item[1])[:k]
+
+    def within(self, lat, lng, radius_km):
+        """Punti entro radius_km come dizionario {id: km}"""
+        if not self.ids:
+            return {}
+
+        if self.tree is not None:
+            indexes = self.tree.query_radius(np.radians([[lat, lng]]), r=radius_km / EARTH_RADIUS_KM)[0]
+            return self._cheap_distances(lat, lng, indexes)
+
+        distances = bulk_cheap_distance_km(lat, lng, self.latitudes, self.longitudes)
+        return {
+            point_id: float(km)
+            for point_id, km in zip(self.ids, distances)
+            if km <= radius_km
+        }
+
+    def _cheap_distances(self, lat, lng, indexes):
+        """Distanze equirettangolari {id: km} verso i punti selezionati dal BallTree"""
+        distances = bulk_cheap_distance_km(
+            lat, lng, [self.latitudes[i] for i in indexes], [self.longitudes[i] for i in indexes]
+        )
+        return {self.ids[i]: float(km) for i, km in zip(indexes, distances)}
@@ -0,0 +1,14 @@
+# core/management/commands/flush_technician_locations.py
+from django.core.management.base import BaseCommand
+from core.models import Technician
+
+class Command(BaseCommand):
+    help = (
+        'Salva sul database le posizioni GPS dei tecnici ancora solo in cache. '
+        'Con BUFFER_TECHNICIAN_LOCATIONS attivo (REDIS_URL) va eseguito periodicamente, '
+        'es. da cron ogni minuto; senza buffer non ha nulla da salvare.'
+    )
+    
+    def handle(self, *args, **options):
+        updated = Technician.flush_cached_locations()
+        self.stdout.write(self.style.SUCCESS(f'Posizioni salvate: {updated}'))
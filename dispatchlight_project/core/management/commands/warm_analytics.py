@@ -0,0 +1,21 @@
+# core/management/commands/warm_analytics.py
+from django.core.management.base import BaseCommand
+from core.analytics import AnalyticsService, ANALYTICS_PAGE_CALLS, reports_page_calls
+from core.models import Company
+
+class Command(BaseCommand):
+    help = 'Precalcola in cache le analytics e i report di ogni azienda (da eseguire periodicamente)'
+    
+    def handle(self, *args, **options):
+        count = 0
+        for company in Company.objects.iterator():
+            analytics = AnalyticsService(company)
+            try:
+                # Solo i risultati mancanti: quelli ancora validi restano in cache
+                analytics.cached_many(ANALYTICS_PAGE_CALLS)
+                analytics.cached_many(reports_page_calls())
+                count += 1
+            except Exception as e:
+                self.stderr.write(f'Analytics non calcolate per {company}: {e}')
+        
+        self.stdout.write(self.style.SUCCESS(f'Analytics precalcolate: {count} aziende'))
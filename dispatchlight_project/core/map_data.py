@@ -0,0 +1,124 @@
+# core/map_data.py - Dati per la mappa live (pagina e API)
+from django.core.cache import cache
+from django.db.models import FloatField, Case, When, Value, IntegerField
+from django.db.models.functions import Cast
+from .models import WorkOrder, Technician, _work_status
+from .geo import demo_address_coordinates, demo_technician_coordinates
+from .serialization import dumps_json
+
+PRIORITY_LABELS = dict(WorkOrder.PRIORITY_CHOICES)
+
+# I marcatori restano in cache al più 30 secondi, i segnali li invalidano prima
+MAP_CACHE_TIMEOUT = 30
+
+# Massimo di ordini inviati alla mappa: i più urgenti e, a pari priorità, i più vecchi
+MAP_ORDERS_LIMIT = 500
+PRIORITY_RANK = Case(
+    When(priority='URGENT', then=Value(0)),
+    When(priority='HIGH', then=Value(1)),
+    When(priority='NORMAL', then=Value(2)),
+    default=Value(3),
+    output_field=IntegerField()
+)
+
+def _map_cache_key(company_id):
+    return f'livemap:{company_id}'
+
+def invalidate_map_markers(company_id):
+    """Invalida i marcatori in cache dell'azienda"""
+    cache.delete(_map_cache_key(company_id))
+
+def cached_map_markers_json(company):
+    """
+    Marcatori di tecnici e ordini dell'azienda già serializzati in JSON, condivisi da pagina e API:
+    a ogni polling si legge la cache senza ricodificare centinaia di marcatori.
+    orders_total e orders_truncated indicano se MAP_ORDERS_LIMIT ha escluso degli ordini.
+    """
+    return cache.get_or_set(_map_cache_key(company.pk), lambda: _map_markers_json(company), MAP_CACHE_TIMEOUT)
+
+def _map_markers_json(company):
+    orders = order_markers(company, MAP_ORDERS_LIMIT)
+    # Il totale costa una query solo quando il limite può aver escluso degli ordini
+    orders_total = len(orders)
+    if orders_total >= MAP_ORDERS_LIMIT:
+        orders_total = _map_orders(company).count()
+    return {
+        'technicians': dumps_json(technician_markers(company)),
+        'orders': dumps_json(orders),
+        'orders_total': orders_total,
+        'orders_truncated': orders_total > len(orders),
+    }
+
+def _full_name(first_name, last_name):
+    """Come User.get_full_name(), dai campi già letti"""
+    return f'{first_name} {last_name}'.strip()
+
+def technician_markers(company):
+    """Tecnici attivi dell'azienda per la mappa, letti come righe semplici (senza istanze dei modelli)"""
+    rows = Technician.objects.filter(
+        company=company,
+        is_active=True
+    ).with_dispatch_stats().with_completed_today().values(
+        'id', 'user__first_name', 'user__last_name', 'phone', 'vehicle_plate', 'last_location_update',
+        'active_count', 'en_route_count', 'on_site_count', 'completed_today'
+    )
+    
+    # Coordinate simulate per demo (sostituire con dati GPS reali)
+    return [
+        {
+            'id': row['id'],
+            'name': _full_name(row['user__first_name'], row['user__last_name']),
+            'phone': str(row['phone']),
+            'vehicle': row['vehicle_plate'],
+            'is_active': True,
+            'current_orders': row['active_count'],
+            'completed_today': row['completed_today'],
+            'lat': lat,
+            'lng': lng,
+            'last_update': row['last_location_update'],
+            'status': _work_status(row['active_count'], row['en_route_count'], row['on_site_count'])
+        }
+        for row in rows
+        for lat, lng in [demo_technician_coordinates(row['id'])]
+    ]
+
+def _map_orders(company):
+    """Ordini da assegnare o assegnati dell'azienda"""
+    return WorkOrder.objects.filter(company=company, status__in=['PENDING', 'ASSIGNED'])
+
+def order_markers(company, limit=MAP_ORDERS_LIMIT):
+    """Ordini da assegnare o assegnati dell'azienda per la mappa (al più limit), letti come righe semplici"""
+    rows = _map_orders(company).annotate(
+        # Prezzo già come double dal DB: nessun Decimal creato per riga
+        estimated_price_float=Cast('estimated_price', FloatField())
+    ).values(
+        'id', 'order_number', 'title', 'description', 'priority', 'status', 'service_address',
+        'created_at', 'estimated_price_float', 'customer__name', 'customer__phone',
+        'technician_id', 'technician__user__first_name', 'technician__user__last_name'
+    ).order_by(PRIORITY_RANK, 'created_at')[:limit]
+    
+    # Coordinate simulate per demo (sostituire con geocoding dell'indirizzo)
+    return [
+        {
+            'id': str(row['id']),
+            'order_number': row['order_number'],
+            'title': row['title'],
+            'description': row['description'],
+            'customer_name': row['customer__name'],
+            'customer_phone': str(row['customer__phone']),
+            'priority': row['priority'],
+            'priority_display': PRIORITY_LABELS.get(row['priority'], row['priority']),
+            'status': row['status'],
+            'service_address': row['service_address'],
+            'created_at': row['created_at'],
+            'technician_id': row['technician_id'],
+            'technician_name': _full_name(
+                row['technician__user__first_name'], row['technician__user__last_name']
+            ) if row['technician_id'] else None,
+            'lat': lat,
+            'lng': lng,
+            'estimated_price': row['estimated_price_float'] or None
+        }
+        for row in rows
+        for lat, lng in [demo_address_coordinates(row['service_address'])]
+    ]
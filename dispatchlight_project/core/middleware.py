@@ -0,0 +1,16 @@
+# core/middleware.py - Contesto azienda per richiesta
+from django.utils.functional import SimpleLazyObject
+from .mixins import get_request_company
+
+class CompanyContextMiddleware:
+    """
+    Espone request.company, risolta in modo pigro e al più una volta per richiesta.
+    Viste e mixin condividono la stessa cache tramite get_request_company().
+    """
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        request.company = SimpleLazyObject(lambda: get_request_company(request))
+        return self.get_response(request)
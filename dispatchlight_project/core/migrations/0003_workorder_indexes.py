@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-15 06:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_workordersequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['technician', 'status', 'priority'], name='wo_tech_status_prio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['company', 'created_at'], name='wo_company_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(condition=models.Q(('status__in', ['ASSIGNED', 'EN_ROUTE', 'ON_SITE'])), fields=['technician', 'priority'], name='wo_open_by_tech_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-15 06:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_workorder_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TechnicianDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('completed', models.PositiveIntegerField(default=0)),
+                ('cancelled', models.PositiveIntegerField(default=0)),
+                ('sum_completion_seconds', models.FloatField(default=0)),
+                ('completed_with_times', models.PositiveIntegerField(default=0)),
+                ('technician', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_stats', to='core.technician')),
+            ],
+            options={
+                'verbose_name_plural': 'Technician daily stats',
+                'unique_together': {('technician', 'date')},
+            },
+        ),
+    ]
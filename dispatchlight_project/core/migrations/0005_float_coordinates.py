@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-15 06:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_techniciandailystats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='customer',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='customer',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='technician',
+            name='current_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='technician',
+            name='current_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='workorder',
+            name='service_latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='workorder',
+            name='service_longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 06:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_float_coordinates'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['company', 'status', '-created_at'], name='wo_company_status_created_idx'),
+        ),
+    ]
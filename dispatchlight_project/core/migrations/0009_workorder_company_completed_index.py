@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_workorder_company_status_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['company', 'completed_at'], name='wo_company_completed_idx'),
+        ),
+    ]
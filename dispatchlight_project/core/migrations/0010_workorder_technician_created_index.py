@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2026-10-15 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_workorder_company_completed_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['technician', 'created_at'], name='wo_tech_created_idx'),
+        ),
+    ]
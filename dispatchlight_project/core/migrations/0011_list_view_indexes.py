@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-15 07:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_workorder_technician_created_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['company', 'name'], name='customer_company_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workorder',
+            index=models.Index(fields=['company', 'technician', '-created_at'], name='wo_company_tech_created_idx'),
+        ),
+    ]
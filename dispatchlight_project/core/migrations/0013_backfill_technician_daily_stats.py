@@ -0,0 +1,48 @@
+# Generated by Django 4.2.7 on 2026-10-15 08:10
+
+from django.db import migrations
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_stats(apps, schema_editor):
+    """Ricostruisce il riepilogo giornaliero dei tecnici con un'unica aggregazione sugli ordini"""
+    WorkOrder = apps.get_model('core', 'WorkOrder')
+    TechnicianDailyStats = apps.get_model('core', 'TechnicianDailyStats')
+    timed = Q(status='COMPLETED', started_at__isnull=False, completed_at__isnull=False)
+    rows = WorkOrder.objects.filter(
+        technician__isnull=False
+    ).annotate(
+        day=TruncDate('created_at')
+    ).values('technician_id', 'day').annotate(
+        total=Count('id'),
+        completed=Count('id', filter=Q(status='COMPLETED')),
+        cancelled=Count('id', filter=Q(status='CANCELLED')),
+        completion_time=Sum(F('completed_at') - F('started_at'), filter=timed),
+        completed_with_times=Count('id', filter=timed),
+    ).order_by()
+
+    TechnicianDailyStats.objects.all().delete()
+    TechnicianDailyStats.objects.bulk_create([
+        TechnicianDailyStats(
+            technician_id=row['technician_id'],
+            date=row['day'],
+            total=row['total'],
+            completed=row['completed'],
+            cancelled=row['cancelled'],
+            sum_completion_seconds=row['completion_time'].total_seconds() if row['completion_time'] else 0,
+            completed_with_times=row['completed_with_times'],
+        )
+        for row in rows.iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_list_view_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_daily_stats, migrations.RunPython.noop),
+    ]
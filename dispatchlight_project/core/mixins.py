@@ -1 +1,186 @@
-# core/mixins.py - NUOVO FILE - Sistema di autorizzazionifrom django.contrib.auth.mixins import LoginRequiredMixinfrom django.core.exceptions import PermissionDeniedfrom django.shortcuts import redirectfrom django.contrib import messagesfrom .models import Company, Technicianclass CompanyAccessMixin(LoginRequiredMixin):    """Base mixin per accesso all'azienda"""        def get_user_company(self):        """Ottiene l'azienda dell'utente corrente"""        user = self.request.user        try:            # Prima controlla se è proprietario            company = user.owned_companies.first()            if company:                return company                        # Poi controlla se è tecnico            technician = Technician.objects.get(user=user)            return technician.company        except Technician.DoesNotExist:            return None        def is_company_owner(self):        """Verifica se l'utente è proprietario dell'azienda"""        return self.request.user.owned_companies.exists()        def get_user_technician(self):        """Ottiene il tecnico se l'utente è un tecnico"""        try:            return Technician.objects.get(user=self.request.user)        except Technician.DoesNotExist:            return Noneclass OwnerRequiredMixin(CompanyAccessMixin):    """Mixin che richiede che l'utente sia proprietario dell'azienda"""        def dispatch(self, request, *args, **kwargs):        if not self.is_company_owner():            messages.error(request, 'Solo il proprietario dell\'azienda può accedere a questa sezione.')            return redirect('core:technician_dashboard')        return super().dispatch(request, *args, **kwargs)class TechnicianAccessMixin(CompanyAccessMixin):    """Mixin per accesso limitato del tecnico"""        def dispatch(self, request, *args, **kwargs):        company = self.get_user_company()        if not company:            messages.error(request, 'Nessuna azienda associata al tuo account.')            return redirect('core:login')        return super().dispatch(request, *args, **kwargs)class TechnicianOwnDataMixin(TechnicianAccessMixin):    """Mixin che permette al tecnico di vedere solo i propri dati"""        def get_queryset(self):        """Override per filtrare solo i dati del tecnico"""        queryset = super().get_queryset() if hasattr(super(), 'get_queryset') else self.model.objects.all()                if self.is_company_owner():            # Il proprietario vede tutti i dati della sua azienda            company = self.get_user_company()            if hasattr(self.model, 'company'):                return queryset.filter(company=company)            elif hasattr(self.model, 'technician'):                return queryset.filter(technician__company=company)        else:            # Il tecnico vede solo i suoi dati            technician = self.get_user_technician()            if technician and hasattr(self.model, 'technician'):                return queryset.filter(technician=technician)            else:                return queryset.none()                return querysetclass SmartRedirectMixin:    """Mixin per reindirizzare automaticamente in base al ruolo"""        def get_success_url(self):        """Reindirizza in base al ruolo dell'utente"""        if hasattr(self, 'success_url') and self.success_url:            return self.success_url                # Reindirizzamento intelligente        if self.request.user.owned_companies.exists():            return '/dashboard/'  # Dashboard proprietario        else:            return '/technician/dashboard/'  # Dashboard tecnico
\ No newline at end of file
+# core/mixins.py - NUOVO FILE - Sistema di autorizzazioni
+from django.conf import settings
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import PermissionDenied
+from django.db.models import Exists, OuterRef, Q, Case, When
+from django.shortcuts import redirect
+from django.contrib import messages
+from .models import Company, Technician
+import uuid
+
+ROLE_OWNER = 'owner'
+ROLE_TECHNICIAN = 'technician'
+
+def get_user_role(user):
+    """Ruolo dell'utente (proprietario, tecnico o None) calcolato con un'unica query"""
+    flags = User.objects.filter(pk=user.pk).annotate(
+        is_owner=Exists(Company.objects.filter(owner=OuterRef('pk'))),
+        is_technician=Exists(Technician.objects.filter(user=OuterRef('pk'))),
+    ).values('is_owner', 'is_technician').first()
+    
+    if not flags:
+        return None
+    if flags['is_owner']:
+        return ROLE_OWNER
+    if flags['is_technician']:
+        return ROLE_TECHNICIAN
+    return None
+
+def _role_version_key(user_id):
+    return f'role_v:{user_id}'
+
+def invalidate_user_role(user_id):
+    """Fa ricalcolare il ruolo salvato nelle sessioni dell'utente (nuova versione in cache)"""
+    cache.set(_role_version_key(user_id), uuid.uuid4().hex, None)
+
+def _role_version(user_id):
+    """Versione corrente del ruolo dell'utente"""
+    key = _role_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Versione persa (cache svuotata o chiave espulsa): una nuova invalida i ruoli in sessione
+        cache.add(key, uuid.uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+def get_session_role(request):
+    """Ruolo dell'utente corrente, salvato in sessione al login"""
+    return _request_cached(request, '_role_cache', lambda: session_role(request.session, request.user))
+
+def session_role(session, user):
+    """
+    Ruolo salvato in sessione insieme alla versione del ruolo dell'utente in cache:
+    se l'azienda posseduta o il profilo tecnico cambiano, la versione cambia e il ruolo si ricalcola.
+    """
+    if not settings.SESSION_ROLE_CACHE:
+        return get_user_role(user)
+    
+    version = _role_version(user.pk)
+    stored = session.get('role')
+    if isinstance(stored, list) and stored[0] == version:
+        return stored[1]
+    
+    role = get_user_role(user)
+    if role is not None:
+        # Nessun ruolo non si salva: l'utente può diventare proprietario o tecnico a metà sessione
+        session['role'] = [version, role]
+    return role
+
+def _request_cached(request, attr, resolve):
+    """Valore per l'utente corrente memorizzato sulla richiesta"""
+    user_pk = request.user.pk
+    cached = getattr(request, attr, None)
+    # La chiave sull'utente gestisce il login a metà richiesta (es. registrazione)
+    if cached is None or cached[0] != user_pk:
+        value = resolve() if request.user.is_authenticated else None
+        cached = (user_pk, value)
+        setattr(request, attr, cached)
+    return cached[1]
+
+def get_request_technician(request):
+    """Tecnico dell'utente corrente (con l'azienda), risolto al più una volta per richiesta"""
+    def resolve():
+        technician = Technician.objects.select_related('company').filter(user=request.user).first()
+        if technician:
+            technician.user = request.user  # Utente già caricato dalla sessione
+        return technician
+    
+    return _request_cached(request, '_technician_cache', resolve)
+
+def get_request_company(request):
+    """Azienda dell'utente corrente: quella posseduta oppure quella del tecnico"""
+    def resolve():
+        user = request.user
+        role = get_session_role(request)
+        
+        # Per il tecnico l'azienda arriva già con la query del tecnico
+        if role == ROLE_TECHNICIAN:
+            technician = get_request_technician(request)
+            return technician.company if technician else None
+        
+        # Per il proprietario basta l'indice su owner_id, senza JOIN sui tecnici
+        if role == ROLE_OWNER:
+            return Company.objects.filter(owner=user).order_by('pk').first()
+        
+        # Ruolo sconosciuto: un'unica query, prima l'azienda posseduta e poi quella del tecnico
+        return Company.objects.filter(
+            Q(owner=user) | Q(technicians__user=user)
+        ).order_by(
+            Case(When(owner=user, then=0), default=1), 'pk'
+        ).first()
+    
+    return _request_cached(request, '_company_cache', resolve)
+
+class CompanyAccessMixin(LoginRequiredMixin):
+    """Base mixin per accesso all'azienda"""
+    
+    def get_user_company(self):
+        """Ottiene l'azienda dell'utente corrente"""
+        return get_request_company(self.request)
+    
+    def is_company_owner(self):
+        """Verifica se l'utente è proprietario dell'azienda"""
+        return get_session_role(self.request) == ROLE_OWNER
+    
+    def get_user_technician(self):
+        """Ottiene il tecnico se l'utente è un tecnico"""
+        return get_request_technician(self.request)
+
+class OwnerRequiredMixin(CompanyAccessMixin):
+    """Mixin che richiede che l'utente sia proprietario dell'azienda"""
+    
+    def dispatch(self, request, *args, **kwargs):
+        if not self.is_company_owner():
+            messages.error(request, 'Solo il proprietario dell\'azienda può accedere a questa sezione.')
+            return redirect('core:technician_dashboard')
+        return super().dispatch(request, *args, **kwargs)
+
+class TechnicianAccessMixin(CompanyAccessMixin):
+    """Mixin per accesso limitato del tecnico"""
+    
+    def dispatch(self, request, *args, **kwargs):
+        company = self.get_user_company()
+        if not company:
+            messages.error(request, 'Nessuna azienda associata al tuo account.')
+            return redirect('core:login')
+        return super().dispatch(request, *args, **kwargs)
+
+class TechnicianOwnDataMixin(TechnicianAccessMixin):
+    """Mixin che permette al tecnico di vedere solo i propri dati"""
+    
+    def get_queryset(self):
+        """Override per filtrare solo i dati del tecnico"""
+        queryset = super().get_queryset() if hasattr(super(), 'get_queryset') else self.model.objects.all()
+        
+        if self.is_company_owner():
+            # Il proprietario vede tutti i dati della sua azienda
+            company = self.get_user_company()
+            if hasattr(self.model, 'company'):
+                return queryset.filter(company=company)
+            elif hasattr(self.model, 'technician'):
+                return queryset.filter(technician__company=company)
+        else:
+            # Il tecnico vede solo i suoi dati
+            technician = self.get_user_technician()
+            if technician and hasattr(self.model, 'technician'):
+                return queryset.filter(technician=technician)
+            else:
+                return queryset.none()
+        
+        return queryset
+
+class SmartRedirectMixin:
+    """Mixin per reindirizzare automaticamente in base al ruolo"""
+    
+    def get_success_url(self):
+        """Reindirizza in base al ruolo dell'utente"""
+        if hasattr(self, 'success_url') and self.success_url:
+            return self.success_url
+        
+        # Reindirizzamento intelligente
+        if get_session_role(self.request) == ROLE_OWNER:
+            return '/dashboard/'  # Dashboard proprietario
+        else:
+            return '/technician/dashboard/'  # Dashboard tecnico
\ No newline at end of file
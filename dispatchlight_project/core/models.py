@@ -1,9 +1,17 @@
 # core/models.py
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction, connection
+from django.db.models import Count, Q, F, Sum, Subquery, OuterRef, IntegerField
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.utils import timezone
 from phonenumber_field.modelfields import PhoneNumberField
+from datetime import datetime, timedelta
 import uuid
+import time
+from .geo import haversine_km, SpatialIndex
+
+COUNTS_CACHE_TIMEOUT = 60
 
 class Company(models.Model):
     """Azienda che usa il sistema"""
@@ -14,12 +22,162 @@ class Company(models.Model):
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name='owned_companies')
     created_at = models.DateTimeField(auto_now_add=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Proprietario al caricamento: se cambia, cambia il ruolo di entrambi gli utenti
+        instance._loaded_owner_id = instance.__dict__.get('owner_id')
+        return instance
+    
+    def cached_counts(self):
+        """Conteggi di tipi servizio, clienti, tecnici e ordini (in cache per COUNTS_CACHE_TIMEOUT)"""
+        version = cache.get_or_set(self._cache_version_key(self.pk), 1, None)
+        return cache.get_or_set(
+            f'co:{self.pk}:v{version}:counts',
+            self._compute_counts,
+            COUNTS_CACHE_TIMEOUT
+        )
+    
+    def _compute_counts(self):
+        """I quattro conteggi in un'unica query"""
+        return Company.objects.filter(pk=self.pk).annotate(
+            service_types_count=SubqueryCount(ServiceType.objects.filter(company=OuterRef('pk')).values('pk')),
+            customers_count=SubqueryCount(Customer.objects.filter(company=OuterRef('pk')).values('pk')),
+            technicians_count=SubqueryCount(Technician.objects.filter(company=OuterRef('pk')).values('pk')),
+            orders_count=SubqueryCount(WorkOrder.objects.filter(company=OuterRef('pk')).values('pk')),
+        ).values('service_types_count', 'customers_count', 'technicians_count', 'orders_count').get()
+    
+    def cached_technician_choices(self):
+        """Tecnici attivi come (id, nome) per i filtri delle liste (in cache per COUNTS_CACHE_TIMEOUT)"""
+        return cache.get_or_set(
+            self._technician_choices_key(self.pk),
+            lambda: [
+                (pk, f'{first_name} {last_name}'.strip())
+                for pk, first_name, last_name in self.technicians.filter(is_active=True).order_by('pk').values_list(
+                    'pk', 'user__first_name', 'user__last_name'
+                )
+            ],
+            COUNTS_CACHE_TIMEOUT
+        )
+    
+    @staticmethod
+    def _technician_choices_key(company_id):
+        return f'co:{company_id}:technician_choices'
+    
+    @classmethod
+    def invalidate_technician_choices(cls, company_id):
+        """Invalida i tecnici in cache per i filtri"""
+        cache.delete(cls._technician_choices_key(company_id))
+    
+    @staticmethod
+    def _cache_version_key(company_id):
+        return f'company_v:{company_id}'
+    
+    @classmethod
+    def bump_cache_version(cls, company_id):
+        """Invalida i dati in cache dell'azienda (nuova versione delle chiavi, nessuna scrittura sul DB)"""
+        try:
+            cache.incr(cls._cache_version_key(company_id))
+        except ValueError:
+            pass  # Nessuna versione in cache: non c'è nulla da invalidare
+    
     def __str__(self):
         return self.name
     
     class Meta:
         verbose_name_plural = "Companies"
 
+class SubqueryCount(Subquery):
+    """COUNT(*) di una subquery correlata (evita JOIN + GROUP BY sulla query esterna)"""
+    template = '(SELECT COUNT(*) FROM (%(subquery)s) _count)'
+    output_field = IntegerField()
+
+# Stati in cui un ordine occupa il tecnico
+ACTIVE_ORDER_STATUSES = ['ASSIGNED', 'EN_ROUTE', 'ON_SITE']
+
+# Campi dell'ordine da cui dipende il riepilogo giornaliero del tecnico
+DAILY_STATS_FIELDS = ('technician_id', 'status', 'started_at', 'completed_at')
+
+# Colonne di testo lungo dell'ordine, da non caricare nelle liste
+WORK_ORDER_TEXT_FIELDS = ['description', 'service_address', 'technician_notes', 'work_performed', 'materials_used']
+
+def _work_status(active_count, en_route_count, on_site_count):
+    """Stato di lavoro del tecnico dai conteggi degli ordini attivi"""
+    if on_site_count:
+        return 'ON_SITE'
+    if en_route_count:
+        return 'EN_ROUTE'
+    if active_count:
+        return 'ASSIGNED'  # Ha ordini assegnati ma non ancora partito
+    return 'AVAILABLE'  # Online e disponibile
+
+def day_bounds(day):
+    """
+    Inizio e fine (esclusa) di un giorno nel fuso corrente.
+    Filtrare con campo__gte/campo__lt invece di campo__date permette di usare gli indici.
+    """
+    start = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+    return start, start + timedelta(days=1)
+
+# Posizioni GPS: con BUFFER_TECHNICIAN_LOCATIONS l'ultima posizione sta in cache
+# e si scrive su DB al massimo ogni LOCATION_FLUSH_SECONDS
+LOCATION_CACHE_TIMEOUT = 60 * 60
+LOCATION_FLUSH_SECONDS = 10
+TECHNICIAN_LOCATION_FIELDS = ['current_latitude', 'current_longitude', 'last_location_update']
+
+# Indici spaziali per azienda, locali al processo: {company_id: (versione, istante di costruzione, SpatialIndex)}.
+# La versione sta in cache: chi scrive posizioni o modifica tecnici la incrementa per tutti i processi
+_dispatch_indexes = {}
+
+class TechnicianQuerySet(models.QuerySet):
+    """QuerySet con le statistiche di dispatch calcolate in un'unica query"""
+    
+    def with_dispatch_stats(self):
+        """Annota conteggi ordini attivi/urgenti/in viaggio/sul posto per ogni tecnico"""
+        return self.annotate(
+            active_count=Count(
+                'work_orders',
+                filter=Q(work_orders__status__in=ACTIVE_ORDER_STATUSES)
+            ),
+            urgent_count=Count(
+                'work_orders',
+                filter=Q(work_orders__status__in=ACTIVE_ORDER_STATUSES, work_orders__priority='URGENT')
+            ),
+            en_route_count=Count('work_orders', filter=Q(work_orders__status='EN_ROUTE')),
+            on_site_count=Count('work_orders', filter=Q(work_orders__status='ON_SITE')),
+        )
+    
+    def with_completed_today(self, today=None):
+        """Annota in completed_today gli ordini completati oggi da ogni tecnico"""
+        start, end = day_bounds(today or timezone.localdate())
+        return self.annotate(completed_today=Count(
+            'work_orders',
+            filter=Q(
+                work_orders__status='COMPLETED',
+                work_orders__completed_at__gte=start,
+                work_orders__completed_at__lt=end
+            )
+        ))
+    
+    def _located_coordinates(self):
+        """Coordinate (id, lat, lng) dei tecnici con posizione GPS"""
+        return list(self.filter(
+            current_latitude__isnull=False,
+            current_longitude__isnull=False
+        ).values_list('id', 'current_latitude', 'current_longitude'))
+    
+    def spatial_index(self):
+        """SpatialIndex sulle posizioni dei tecnici del queryset"""
+        rows = self._located_coordinates()
+        if rows and settings.BUFFER_TECHNICIAN_LOCATIONS:
+            # Le posizioni in cache sono più recenti di quelle salvate
+            cached = cache.get_many([Technician.location_cache_key(tech_id) for tech_id, _, _ in rows])
+            rows = [
+                (tech_id, *cached.get(Technician.location_cache_key(tech_id), (lat, lng))[:2])
+                for tech_id, lat, lng in rows
+            ]
+        return SpatialIndex(*zip(*rows)) if rows else SpatialIndex([], [], [])
+
 class Technician(models.Model):
     """Tecnico/operatore mobile"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -28,91 +186,166 @@ class Technician(models.Model):
     vehicle_plate = models.CharField(max_length=20, blank=True, null=True)
     is_active = models.BooleanField(default=True)
     
-    # Posizione GPS corrente
-    current_latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
-    current_longitude = models.DecimalField(max_digits=11, decimal_places=8, blank=True, null=True)
+    # Posizione GPS corrente (double: nessuna conversione Decimal nei calcoli di distanza)
+    current_latitude = models.FloatField(blank=True, null=True)
+    current_longitude = models.FloatField(blank=True, null=True)
     last_location_update = models.DateTimeField(blank=True, null=True)
     
-    # Aggiungi questi metodi alla classe Technician esistente in core/models.py:
-
+    objects = TechnicianQuerySet.as_manager()
+    
+    def _get_active_orders_count(self):
+        """Ordini attivi: usa l'annotazione di with_dispatch_stats() se presente"""
+        active_count = getattr(self, 'active_count', None)
+        if active_count is not None:
+            return active_count
+        return self.work_orders.filter(status__in=ACTIVE_ORDER_STATUSES).count()
+    
     def get_current_status(self):
         """Restituisce lo stato corrente del tecnico"""
         if not self.is_active:
             return 'OFFLINE'
         
-        active_orders = self.work_orders.filter(
-            status__in=['ASSIGNED', 'EN_ROUTE', 'ON_SITE']
-        ).count()
+        if getattr(self, 'on_site_count', None) is not None:
+            # Dati già annotati da with_dispatch_stats()
+            return _work_status(self.active_count, self.en_route_count, self.on_site_count)
         
-        if active_orders > 0:
-            # Controlla se è in viaggio o sul posto
-            current_order = self.work_orders.filter(
-                status__in=['EN_ROUTE', 'ON_SITE']
-            ).first()
-            
-            if current_order:
-                return current_order.status
-            else:
-                return 'ASSIGNED'  # Ha ordini assegnati ma non ancora partito
-        
-        return 'AVAILABLE'  # Online e disponibile
+        # Tutti i conteggi in un'unica query
+        counts = self.work_orders.filter(status__in=ACTIVE_ORDER_STATUSES).aggregate(
+            active_count=Count('id'),
+            en_route_count=Count('id', filter=Q(status='EN_ROUTE')),
+            on_site_count=Count('id', filter=Q(status='ON_SITE')),
+        )
+        return _work_status(**counts)
     
     def get_distance_from(self, lat, lng):
         """Calcola distanza da coordinate specifiche"""
         if not self.current_latitude or not self.current_longitude:
             return None
         
-        from math import radians, sin, cos, sqrt, atan2
-        
-        R = 6371  # Raggio Terra in km
-        
-        lat1 = radians(float(self.current_latitude))
-        lng1 = radians(float(self.current_longitude))
-        lat2 = radians(lat)
-        lng2 = radians(lng)
-        
-        dlat = lat2 - lat1
-        dlng = lng2 - lng1
-        
-        a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlng/2)**2
-        c = 2 * atan2(sqrt(a), sqrt(1-a))
-        
-        return R * c
+        return haversine_km(self.current_latitude, self.current_longitude, lat, lng)
+    
+    @staticmethod
+    def location_cache_key(technician_id):
+        return f'tech_loc:{technician_id}'
+    
+    @staticmethod
+    def _dispatch_index_version_key(company_id):
+        return f'dispatch_index_v:{company_id}'
+    
+    @classmethod
+    def dispatch_index(cls, company_id):
+        """
+        Indice spaziale dei tecnici attivi di un'azienda, tenuto in memoria dal processo.
+        Viene ricostruito quando cambia la versione in cache (posizioni salvate, tecnici modificati)
+        o dopo LOCATION_FLUSH_SECONDS, per includere le posizioni arrivate solo in cache.
+        """
+        version = cache.get_or_set(cls._dispatch_index_version_key(company_id), 1, None)
+        entry = _dispatch_indexes.get(company_id)
+        if entry is None or entry[0] != version or time.monotonic() - entry[1] > LOCATION_FLUSH_SECONDS:
+            index = cls.objects.filter(company_id=company_id, is_active=True).spatial_index()
+            entry = _dispatch_indexes[company_id] = (version, time.monotonic(), index)
+        return entry[2]
+    
+    @classmethod
+    def invalidate_dispatch_index(cls, company_id):
+        """Invalida l'indice spaziale dell'azienda in tutti i processi (nuova versione)"""
+        try:
+            cache.incr(cls._dispatch_index_version_key(company_id))
+        except ValueError:
+            pass  # Nessuna versione in cache: nessun indice da invalidare
     
     def update_location(self, latitude, longitude):
-        """Aggiorna la posizione GPS del tecnico"""
-        from django.utils import timezone
+        """
+        Aggiorna la posizione GPS del tecnico.
+        Con BUFFER_TECHNICIAN_LOCATIONS (cache condivisa) la posizione va in cache
+        e sul DB si scrive al massimo una volta ogni LOCATION_FLUSH_SECONDS:
+        il resto lo salva flush_cached_locations(). Altrimenti si scrive sempre sul DB.
+        """
         self.current_latitude = latitude
         self.current_longitude = longitude
         self.last_location_update = timezone.now()
-        self.save(update_fields=['current_latitude', 'current_longitude', 'last_location_update'])
+        
+        if settings.BUFFER_TECHNICIAN_LOCATIONS:
+            cache.set(
+                self.location_cache_key(self.pk),
+                (latitude, longitude, self.last_location_update),
+                LOCATION_CACHE_TIMEOUT
+            )
+            
+            # cache.add è atomico: un solo ping per finestra scrive sul DB
+            if not cache.add(f'tech_loc_flush:{self.pk}', True, LOCATION_FLUSH_SECONDS):
+                return
+        
+        self.save(update_fields=TECHNICIAN_LOCATION_FIELDS)
+        self.invalidate_dispatch_index(self.company_id)
+    
+    @classmethod
+    def flush_cached_locations(cls, batch_size=500):
+        """Salva sul DB, con un bulk_update, le posizioni in cache più recenti di quelle salvate"""
+        if not settings.BUFFER_TECHNICIAN_LOCATIONS:
+            return 0  # Senza buffer update_location() scrive già sul DB
+        
+        technicians = cls.objects.filter(is_active=True).only('id', 'company_id', 'last_location_update')
+        by_key = {cls.location_cache_key(tech.id): tech for tech in technicians}
+        cached = cache.get_many(list(by_key))
+        
+        to_update = []
+        changed_companies = set()
+        for key, (latitude, longitude, updated_at) in cached.items():
+            tech = by_key[key]
+            if tech.last_location_update is None or updated_at > tech.last_location_update:
+                changed_companies.add(tech.company_id)
+                to_update.append(cls(
+                    id=tech.id,
+                    current_latitude=latitude,
+                    current_longitude=longitude,
+                    last_location_update=updated_at
+                ))
+        
+        cls.objects.bulk_update(
+            to_update,
+            TECHNICIAN_LOCATION_FIELDS,
+            batch_size=batch_size
+        )
+        
+        # Gli indici spaziali delle aziende con posizioni cambiate vanno ricostruiti
+        for company_id in changed_companies:
+            cls.invalidate_dispatch_index(company_id)
+        
+        return len(to_update)
     
     @property
     def is_online(self):
         """Controlla se il tecnico è online (aggiornamento GPS recente)"""
-        if not self.last_location_update:
+        last_update = self.last_location_update
+        
+        # La cache può avere una posizione più recente non ancora salvata
+        if settings.BUFFER_TECHNICIAN_LOCATIONS:
+            cached = cache.get(self.location_cache_key(self.pk))
+            if cached:
+                last_update = cached[2]
+        
+        if not last_update:
             return False
         
         # Considera online se l'ultimo aggiornamento è entro 5 minuti
-        from datetime import timedelta
-        from django.utils import timezone
         threshold = timezone.now() - timedelta(minutes=5)
-        return self.last_location_update > threshold
+        return last_update > threshold
     
     def get_workload_score(self):
         """Calcola score del carico di lavoro (0-100)"""
-        active_orders = self.work_orders.filter(
-            status__in=['ASSIGNED', 'EN_ROUTE', 'ON_SITE']
-        ).count()
+        active_orders = self._get_active_orders_count()
         
         # Score basato su numero ordini (massimo teorico 5)
         base_score = min(active_orders * 20, 100)
         
         # Penalità per ordini urgenti
-        urgent_orders = self.work_orders.filter(
-            status__in=['ASSIGNED', 'EN_ROUTE', 'ON_SITE'],
-            priority='URGENT'
-        ).count()
+        urgent_orders = getattr(self, 'urgent_count', None)
+        if urgent_orders is None:
+            urgent_orders = self.work_orders.filter(
+                status__in=ACTIVE_ORDER_STATUSES,
+                priority='URGENT'
+            ).count()
         
         urgency_penalty = urgent_orders * 10
         
@@ -123,42 +356,52 @@ class Technician(models.Model):
         if not self.is_active:
             return False
         
-        current_orders = self.work_orders.filter(
-            status__in=['ASSIGNED', 'EN_ROUTE', 'ON_SITE']
-        ).count()
+        active_count = getattr(self, 'active_count', None)
+        if active_count is not None:
+            return active_count < max_orders
         
-        return current_orders < max_orders
+        if max_orders <= 0:
+            return False
+        
+        # Basta sapere se esiste il max_orders-esimo ordine attivo: LIMIT 1 OFFSET max_orders - 1
+        return not self.work_orders.filter(
+            status__in=ACTIVE_ORDER_STATUSES
+        ).order_by()[max_orders - 1:max_orders].exists()
     
     def get_performance_stats(self, days=30):
-        """Statistiche performance degli ultimi N giorni"""
-        from datetime import timedelta, date
-        from django.utils import timezone
-        from django.db.models import Count, Avg, F
-        
+        """Statistiche performance degli ultimi N giorni (dal riepilogo giornaliero)"""
         start_date = timezone.now().date() - timedelta(days=days)
         
-        stats = self.work_orders.filter(
-            created_at__date__gte=start_date
+        totals = self.daily_stats.filter(
+            date__gte=start_date
         ).aggregate(
-            total_orders=Count('id'),
-            completed_orders=Count('id', filter=Q(status='COMPLETED')),
-            cancelled_orders=Count('id', filter=Q(status='CANCELLED')),
-            avg_completion_time=Avg(
-                F('completed_at') - F('started_at'),
-                filter=Q(status='COMPLETED', started_at__isnull=False, completed_at__isnull=False)
-            )
+            total_orders=Sum('total'),
+            completed_orders=Sum('completed'),
+            cancelled_orders=Sum('cancelled'),
+            completion_seconds=Sum('sum_completion_seconds'),
+            completed_with_times=Sum('completed_with_times'),
         )
         
+        stats = {
+            'total_orders': totals['total_orders'] or 0,
+            'completed_orders': totals['completed_orders'] or 0,
+            'cancelled_orders': totals['cancelled_orders'] or 0,
+        }
+        
         completion_rate = 0
         if stats['total_orders'] > 0:
             completion_rate = (stats['completed_orders'] / stats['total_orders']) * 100
         
+        avg_completion_hours = None
+        if totals['completed_with_times']:
+            avg_completion_hours = round(totals['completion_seconds'] / totals['completed_with_times'] / 3600, 1)
+        
         return {
-            'total_orders': stats['total_orders'] or 0,
-            'completed_orders': stats['completed_orders'] or 0,
-            'cancelled_orders': stats['cancelled_orders'] or 0,
+            'total_orders': stats['total_orders'],
+            'completed_orders': stats['completed_orders'],
+            'cancelled_orders': stats['cancelled_orders'],
             'completion_rate': round(completion_rate, 1),
-            'avg_completion_hours': round(stats['avg_completion_time'].total_seconds() / 3600, 1) if stats['avg_completion_time'] else None,
+            'avg_completion_hours': avg_completion_hours,
             'efficiency_score': self._calculate_efficiency_score(stats, completion_rate)
         }
     
@@ -187,14 +430,20 @@ class Customer(models.Model):
     address = models.TextField()
     
     # Coordinate per ottimizzare i percorsi
-    latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
-    longitude = models.DecimalField(max_digits=11, decimal_places=8, blank=True, null=True)
+    latitude = models.FloatField(blank=True, null=True)
+    longitude = models.FloatField(blank=True, null=True)
     
     notes = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"{self.name} - {self.company.name}"
+    
+    class Meta:
+        indexes = [
+            # Lista clienti dell'azienda ordinata per nome
+            models.Index(fields=['company', 'name'], name='customer_company_name_idx'),
+        ]
 
 class ServiceType(models.Model):
     """Tipologia di servizio/intervento"""
@@ -254,8 +503,8 @@ class WorkOrder(models.Model):
     
     # Indirizzo specifico dell'intervento (può essere diverso da quello del cliente)
     service_address = models.TextField()
-    service_latitude = models.DecimalField(max_digits=10, decimal_places=8, blank=True, null=True)
-    service_longitude = models.DecimalField(max_digits=11, decimal_places=8, blank=True, null=True)
+    service_latitude = models.FloatField(blank=True, null=True)
+    service_longitude = models.FloatField(blank=True, null=True)
     
     # Note e risultato
     technician_notes = models.TextField(blank=True, null=True)
@@ -266,22 +515,167 @@ class WorkOrder(models.Model):
     estimated_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     final_price = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Valori al caricamento: il riepilogo dei tecnici si ricalcola solo se cambiano
+        instance._loaded_stats_values = instance.daily_stats_values()
+        return instance
+    
+    def daily_stats_values(self):
+        """Campi da cui dipende il riepilogo giornaliero (i campi differiti restano None, senza query)"""
+        return {field: self.__dict__.get(field) for field in DAILY_STATS_FIELDS}
+    
     def save(self, *args, **kwargs):
-        if not self.order_number:
-            # Genera numero ordine automatico
+        if self.order_number:
+            return super().save(*args, **kwargs)
+        
+        # Genera numero ordine automatico dal contatore annuale dell'azienda:
+        # contatore e inserimento nella stessa transazione
+        with transaction.atomic():
             year = timezone.now().year
-            count = WorkOrder.objects.filter(
-                company=self.company,
-                created_at__year=year
-            ).count() + 1
-            self.order_number = f"{self.company.name[:3].upper()}{year}{count:04d}"
-        super().save(*args, **kwargs)
+            count = WorkOrderSequence.next_number(self.company, year)
+            self.order_number = f"{self.order_number_prefix(self.company, year)}{count:04d}"
+            super().save(*args, **kwargs)
+    
+    @staticmethod
+    def order_number_prefix(company, year):
+        return f"{company.name[:3].upper()}{year}"
     
     def __str__(self):
         return f"{self.order_number} - {self.title}"
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Stato/carico dei tecnici (copre anche technician+status)
+            models.Index(fields=['technician', 'status', 'priority'], name='wo_tech_status_prio_idx'),
+            # Ordini del tecnico per data (lista, dashboard e statistiche del tecnico)
+            models.Index(fields=['technician', 'created_at'], name='wo_tech_created_idx'),
+            # Contatore annuale e liste per azienda
+            models.Index(fields=['company', 'created_at'], name='wo_company_created_idx'),
+            # Completati per giorno (statistiche di oggi)
+            models.Index(fields=['company', 'completed_at'], name='wo_company_completed_idx'),
+            # Lista ordini filtrata per stato e ordinata per data (copre anche company+status)
+            models.Index(fields=['company', 'status', '-created_at'], name='wo_company_status_created_idx'),
+            # Lista ordini filtrata per tecnico e ordinata per data
+            models.Index(fields=['company', 'technician', '-created_at'], name='wo_company_tech_created_idx'),
+            # Indice parziale sui soli ordini aperti (piccolo e sempre in cache)
+            models.Index(
+                fields=['technician', 'priority'],
+                condition=Q(status__in=ACTIVE_ORDER_STATUSES),
+                name='wo_open_by_tech_idx'
+            ),
+        ]
+
+def _supports_update_returning():
+    """UPDATE ... RETURNING è disponibile su PostgreSQL e SQLite >= 3.35"""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+class WorkOrderSequence(models.Model):
+    """Contatore progressivo dei numeri ordine per azienda e anno"""
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='work_order_sequences')
+    year = models.PositiveSmallIntegerField()
+    last_number = models.PositiveIntegerField(default=0)
+    
+    @classmethod
+    def next_number(cls, company, year):
+        """Incrementa atomicamente il contatore e restituisce il nuovo valore (da chiamare in una transazione)"""
+        number = cls._increment(company.pk, year)
+        if number is None:
+            # Primo ordine dell'anno con il contatore: riparte dal numero più alto già usato
+            cls.objects.get_or_create(
+                company=company,
+                year=year,
+                defaults={'last_number': cls._last_used_number(company, year)}
+            )
+            number = cls._increment(company.pk, year)
+        return number
+    
+    @staticmethod
+    def _last_used_number(company, year):
+        """Suffisso numerico più alto tra i numeri ordine dell'anno (il conteggio collide dopo le cancellazioni)"""
+        prefix = WorkOrder.order_number_prefix(company, year)
+        suffixes = (
+            number[len(prefix):]
+            for number in WorkOrder.objects.filter(
+                company=company, order_number__startswith=prefix
+            ).values_list('order_number', flat=True).iterator()
+        )
+        return max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+    
+    @classmethod
+    def _increment(cls, company_id, year):
+        """Incremento e lettura del contatore; None se il contatore non esiste ancora"""
+        if not _supports_update_returning():
+            counters = cls.objects.filter(company_id=company_id, year=year)
+            if not counters.update(last_number=F('last_number') + 1):
+                return None
+            return counters.values_list('last_number', flat=True).get()
+        
+        # UPDATE ... RETURNING: un solo statement, la riga resta bloccata fino al commit
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {connection.ops.quote_name(cls._meta.db_table)} "
+                "SET last_number = last_number + 1 "
+                "WHERE company_id = %s AND year = %s "
+                "RETURNING last_number",
+                [company_id, year]
+            )
+            row = cursor.fetchone()
+        return row[0] if row else None
+    
+    def __str__(self):
+        return f"{self.company.name} {self.year}: {self.last_number}"
+    
+    class Meta:
+        unique_together = [('company', 'year')]
+
+class TechnicianDailyStats(models.Model):
+    """Riepilogo giornaliero degli ordini di un tecnico (per data di creazione dell'ordine)"""
+    technician = models.ForeignKey(Technician, on_delete=models.CASCADE, related_name='daily_stats')
+    date = models.DateField()
+    total = models.PositiveIntegerField(default=0)
+    completed = models.PositiveIntegerField(default=0)
+    cancelled = models.PositiveIntegerField(default=0)
+    sum_completion_seconds = models.FloatField(default=0)
+    completed_with_times = models.PositiveIntegerField(default=0)
+    
+    @classmethod
+    def refresh_for(cls, technician_id, day):
+        """Ricalcola il riepilogo di un tecnico per un giorno dagli ordini di quel giorno"""
+        timed = Q(status='COMPLETED', started_at__isnull=False, completed_at__isnull=False)
+        day_start, day_end = day_bounds(day)
+        stats = WorkOrder.objects.filter(
+            technician_id=technician_id,
+            created_at__gte=day_start,
+            created_at__lt=day_end
+        ).aggregate(
+            total=Count('id'),
+            completed=Count('id', filter=Q(status='COMPLETED')),
+            cancelled=Count('id', filter=Q(status='CANCELLED')),
+            completion_time=Sum(F('completed_at') - F('started_at'), filter=timed),
+            completed_with_times=Count('id', filter=timed),
+        )
+        
+        if not stats['total']:
+            cls.objects.filter(technician_id=technician_id, date=day).delete()
+            return
+        
+        completion_time = stats.pop('completion_time')
+        stats['sum_completion_seconds'] = completion_time.total_seconds() if completion_time else 0
+        cls.objects.update_or_create(technician_id=technician_id, date=day, defaults=stats)
+    
+    def __str__(self):
+        return f"{self.technician} - {self.date}"
+    
+    class Meta:
+        verbose_name_plural = "Technician daily stats"
+        unique_together = [('technician', 'date')]
 
 class Expense(models.Model):
     """Spese sostenute durante l'intervento"""
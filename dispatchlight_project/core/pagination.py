@@ -0,0 +1,48 @@
+# core/pagination.py - Paginazione per liste grandi
+import hashlib
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+PAGINATOR_COUNT_TIMEOUT = 60
+
+def _count_version_key(company_id):
+    return f'paginator_count_v:{company_id}'
+
+def invalidate_paginator_counts(company_id):
+    """Invalida i conteggi in cache delle liste dell'azienda (nuova versione delle chiavi)"""
+    try:
+        cache.incr(_count_version_key(company_id))
+    except ValueError:
+        pass  # Nessuna versione in cache: non c'è nulla da invalidare
+
+class CachedCountPaginator(Paginator):
+    """
+    Paginator che tiene in cache per PAGINATOR_COUNT_TIMEOUT il COUNT(*) della lista:
+    sfogliando le pagine il conteggio non viene ricalcolato a ogni richiesta.
+    La cache vale solo con company_id: i segnali sugli ordini invalidano i conteggi dell'azienda.
+    Se il chiamante conosce già il totale può passarlo come known_count.
+    """
+    
+    def __init__(self, *args, known_count=None, company_id=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.known_count = known_count
+        self.company_id = company_id
+    
+    @cached_property
+    def count(self):
+        if self.known_count is not None:
+            return self.known_count
+        
+        query = getattr(self.object_list, 'query', None)
+        if query is None or self.company_id is None:
+            return super().count
+        
+        # La chiave dipende dalla query completa (filtri e parametri compresi) e dalla versione dell'azienda
+        version = cache.get_or_set(_count_version_key(self.company_id), 1, None)
+        digest = hashlib.md5(str(query).encode()).hexdigest()
+        return cache.get_or_set(
+            f'paginator_count:{self.company_id}:v{version}:{digest}',
+            lambda: Paginator.count.func(self),
+            PAGINATOR_COUNT_TIMEOUT
+        )
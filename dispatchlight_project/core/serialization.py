@@ -0,0 +1,27 @@
+# core/serialization.py - JSON compatto per grafici e mappa
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+
+# orjson è opzionale: senza, si usa json della libreria standard
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def dumps_json(data):
+    """
+    Serializza in una stringa JSON compatta (orjson se disponibile).
+    Date e datetime escono in ISO 8601 con entrambi i backend, i Decimal come stringhe.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=str).decode()
+    return json.dumps(data, separators=(',', ':'), cls=DjangoJSONEncoder)
+
+def loads_json(data):
+    """
+    Decodifica JSON da bytes o stringa (orjson se disponibile, senza decodificare prima i bytes).
+    In caso di errore solleva json.JSONDecodeError con entrambi i backend.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -0,0 +1,109 @@
+# core/signals.py - Aggiornamento dei dati derivati dagli ordini
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from .models import Company, Customer, ServiceType, WorkOrder, Technician, TechnicianDailyStats, TECHNICIAN_LOCATION_FIELDS
+from .mixins import session_role, invalidate_user_role
+from .analytics import invalidate_analytics
+from .map_data import invalidate_map_markers
+from .pagination import invalidate_paginator_counts
+
+def _refresh_daily_stats(created_at, technician_ids):
+    """Ricalcola il riepilogo del giorno di creazione dell'ordine per i tecnici coinvolti"""
+    day = timezone.localdate(created_at)
+    for technician_id in technician_ids:
+        if technician_id:
+            TechnicianDailyStats.refresh_for(technician_id, day)
+
+def refresh_order_derived_data(company_id, created_at, technician_ids):
+    """
+    Dati derivati di un ordine modificato con QuerySet.update(), che non invia segnali:
+    riepilogo giornaliero dei tecnici coinvolti, analytics, mappa e conteggi delle liste dell'azienda.
+    """
+    _refresh_daily_stats(created_at, technician_ids)
+    invalidate_analytics(company_id)
+    invalidate_map_markers(company_id)
+    invalidate_paginator_counts(company_id)
+
+@receiver(post_save, sender=WorkOrder)
+def work_order_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    loaded = getattr(instance, '_loaded_stats_values', None)
+    current = instance.daily_stats_values()
+    
+    # Note, prezzi e indirizzi non cambiano il riepilogo: si ricalcola solo per tecnico, stato o tempi
+    if created or loaded != current:
+        previous_technician_id = loaded['technician_id'] if loaded else None
+        _refresh_daily_stats(instance.created_at, {instance.technician_id, previous_technician_id})
+    
+    instance._loaded_stats_values = current
+    invalidate_analytics(instance.company_id)
+    invalidate_paginator_counts(instance.company_id)
+
+@receiver(post_delete, sender=WorkOrder)
+def work_order_deleted(sender, instance, **kwargs):
+    _refresh_daily_stats(instance.created_at, {instance.technician_id})
+    invalidate_analytics(instance.company_id)
+    invalidate_paginator_counts(instance.company_id)
+
+@receiver(post_save, sender=ServiceType)
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Technician)
+@receiver(post_save, sender=WorkOrder)
+def company_data_saved(sender, instance, created=False, raw=False, **kwargs):
+    """I conteggi in cache cambiano solo con nuovi record"""
+    if created and not raw:
+        Company.bump_cache_version(instance.company_id)
+        # Per gli ordini le analytics sono già invalidate da work_order_saved
+        if sender is not WorkOrder:
+            invalidate_analytics(instance.company_id)
+
+@receiver(post_delete, sender=ServiceType)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Technician)
+@receiver(post_delete, sender=WorkOrder)
+def company_data_deleted(sender, instance, **kwargs):
+    Company.bump_cache_version(instance.company_id)
+    if sender is not WorkOrder:
+        invalidate_analytics(instance.company_id)
+
+@receiver(post_save, sender=Customer)
+@receiver(post_save, sender=Technician)
+@receiver(post_save, sender=WorkOrder)
+@receiver(post_delete, sender=Customer)
+@receiver(post_delete, sender=Technician)
+@receiver(post_delete, sender=WorkOrder)
+def map_data_changed(sender, instance, raw=False, **kwargs):
+    """Ogni modifica a clienti, tecnici o ordini può cambiare i marcatori della mappa"""
+    if not raw:
+        invalidate_map_markers(instance.company_id)
+
+@receiver(post_save, sender=Technician)
+@receiver(post_delete, sender=Technician)
+def technician_changed(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Attivazione o cambio azienda di un tecnico cambiano filtri delle liste, tecnici attivi in dashboard, indice spaziale e ruolo dell'utente"""
+    if update_fields and update_fields <= set(TECHNICIAN_LOCATION_FIELDS):
+        return  # Solo posizione GPS: l'indice spaziale lo invalida update_location()
+    if not raw:
+        Company.invalidate_technician_choices(instance.company_id)
+        Technician.invalidate_dispatch_index(instance.company_id)
+        invalidate_analytics(instance.company_id)
+        invalidate_user_role(instance.user_id)
+
+@receiver(user_logged_in)
+def store_session_role(sender, request, user, **kwargs):
+    """Salva il ruolo in sessione: i redirect successivi non interrogano il DB"""
+    session_role(request.session, user)
+
+@receiver(post_save, sender=Company)
+@receiver(post_delete, sender=Company)
+def company_owner_changed(sender, instance, raw=False, **kwargs):
+    """Il ruolo in sessione del proprietario attuale e di quello precedente va ricalcolato"""
+    if raw:
+        return
+    for user_id in {instance.owner_id, getattr(instance, '_loaded_owner_id', None)}:
+        if user_id:
+            invalidate_user_role(user_id)
+    instance._loaded_owner_id = instance.owner_id
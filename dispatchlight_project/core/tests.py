@@ -1,3 +1,544 @@
-from django.test import TestCase
+from decimal import Decimal
+from importlib import import_module
+from unittest import mock
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from .analytics import ANALYTICS_PAGE_CALLS, AnalyticsService
+from .geo import SpatialIndex, bulk_cheap_distance_km
+from .models import Company, Customer, ServiceType, Technician, TechnicianDailyStats, WorkOrder, WorkOrderSequence, _dispatch_indexes
+
+class DispatchDataTestCase(TestCase):
+    """Azienda con clienti, tre tecnici e dodici ordini in tutti gli stati"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user('owner', password='pw', first_name='Mario', last_name='Rossi')
+        cls.company = Company.objects.create(
+            name='Acme', address='Via Roma 1', phone='+390612345678', email='info@acme.it', owner=cls.owner
+        )
+        service_type = ServiceType.objects.create(company=cls.company, name='Riparazione')
+        customers = [
+            Customer.objects.create(company=cls.company, name=f'Cliente {i}', phone=f'+39061234560{i}', address=f'Via {i}')
+            for i in range(3)
+        ]
+        cls.technicians = []
+        for i in range(3):
+            user = User.objects.create_user(f'tech{i}', password='pw', first_name='Tecnico', last_name=str(i))
+            cls.technicians.append(Technician.objects.create(
+                user=user, company=cls.company, phone=f'+39061234570{i}',
+                current_latitude=41.9 + i / 100, current_longitude=12.5
+            ))
+
+        now = timezone.now()
+        statuses = ['PENDING', 'ASSIGNED', 'EN_ROUTE', 'ON_SITE', 'COMPLETED', 'CANCELLED']
+        cls.orders = []
+        for i in range(12):
+            status = statuses[i % len(statuses)]
+            order = WorkOrder.objects.create(
+                company=cls.company, customer=customers[i % 3], service_type=service_type,
+                technician=cls.technicians[i % 3] if status != 'PENDING' else None,
+                title=f'Ordine {i}', description='Descrizione', status=status,
+                priority='URGENT' if i % 4 == 0 else 'NORMAL', service_address=f'Via {i}',
+                estimated_price=Decimal('50.00'), scheduled_date=now + timezone.timedelta(hours=i)
+            )
+            if status == 'COMPLETED':
+                order.started_at = now - timezone.timedelta(hours=2)
+                order.completed_at = now
+                order.final_price = Decimal('80.00')
+                order.save()
+            cls.orders.append(order)
+        cls.customer = customers[0]
+
+    def setUp(self):
+        cache.clear()
+
+
+@override_settings(SESSION_ROLE_CACHE=True)
+class QueryBudgetTests(DispatchDataTestCase):
+    """
+    Numero massimo di query per le pagine principali, a cache vuota e con il ruolo in sessione
+    (configurazione con cache condivisa).
+    Ogni budget comprende sessione e utente (2 query): un accesso lazy a una FK
+    in una lista (N+1) lo supera, perché ogni lista ha più righe.
+    """
+
+    def clear_data_cache(self):
+        """Svuota la cache mantenendo la versione del ruolo: la sessione resta valida"""
+        key = 'role_v:%s' % self.client.session['_auth_user_id']
+        version = cache.get(key)
+        cache.clear()
+        cache.set(key, version, None)
+
+    def assertQueryBudget(self, url, budget):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(
+            len(context), budget,
+            '\n'.join(query['sql'] for query in context.captured_queries)
+        )
+
+    def test_owner_pages(self):
+        self.client.login(username='owner', password='pw')
+        technician = self.technicians[0]
+        budgets = [
+            (reverse('core:dashboard'), 8),
+            (reverse('core:live_map'), 5),
+            (reverse('core:map_data_api'), 5),
+            (reverse('core:technician_list'), 5),
+            (reverse('core:technician_detail', args=[technician.pk]), 7),
+            (reverse('core:order_list'), 8),
+            (reverse('core:order_create'), 7),
+            (reverse('core:order_detail', args=[self.orders[1].pk]), 6),
+            (reverse('core:customer_list'), 5),
+            (reverse('core:customer_detail', args=[self.customer.pk]), 5),
+            (reverse('core:company_settings'), 4),
+            (reverse('core:user_profile'), 4),
+        ]
+        for url, budget in budgets:
+            with self.subTest(url=url):
+                self.clear_data_cache()
+                self.assertQueryBudget(url, budget)
+
+    def test_technician_pages(self):
+        self.client.login(username='tech1', password='pw')
+        budgets = [
+            (reverse('core:technician_dashboard'), 10),
+            (reverse('core:technician_order_list'), 5),
+            (reverse('core:technician_order_detail', args=[self.orders[1].pk]), 7),
+            (reverse('core:technician_upcoming_orders'), 4),
+            (reverse('core:technician_stats'), 7),
+            (reverse('core:technician_profile'), 4),
+            (reverse('core:user_profile'), 3),
+        ]
+        for url, budget in budgets:
+            with self.subTest(url=url):
+                self.clear_data_cache()
+                self.assertQueryBudget(url, budget)
+
+    def test_technician_list_constant_queries(self):
+        """Le query della lista tecnici non crescono con il numero di tecnici"""
+        self.client.login(username='owner', password='pw')
+        url = reverse('core:technician_list')
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+        for i in range(3, 6):
+            user = User.objects.create_user(f'tech{i}', password='pw', first_name='Tecnico', last_name=str(i))
+            Technician.objects.create(user=user, company=self.company, phone=f'+39061234570{i}')
+        self.clear_data_cache()
+        with self.assertNumQueries(len(before)):
+            self.client.get(url)
+
+    def test_assign_api_loads_order_once(self):
+        """Le coordinate del servizio arrivano con l'ordine: nessuna query per campi differiti"""
+        WorkOrder.objects.filter(pk=self.orders[0].pk).update(service_latitude=41.95, service_longitude=12.45)
+        self.client.login(username='owner', password='pw')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                reverse('core:api_assign_order'),
+                {'order_id': str(self.orders[0].pk), 'technician_id': self.technicians[0].pk},
+                content_type='application/json'
+            )
+        self.assertIsNotNone(response.json()['order']['estimated_distance_km'])
+        coordinate_loads = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT') and '"core_workorder"."service_l' in query['sql']
+        ]
+        self.assertEqual(len(coordinate_loads), 1)
+
+    def test_cached_pages(self):
+        """Con la cache calda dashboard e mappa non ricalcolano statistiche e marcatori"""
+        self.client.login(username='owner', password='pw')
+        for url, budget in [(reverse('core:dashboard'), 4), (reverse('core:map_data_api'), 3)]:
+            with self.subTest(url=url):
+                self.client.get(url)
+                self.assertQueryBudget(url, budget)
+
+
+@override_settings(BUFFER_TECHNICIAN_LOCATIONS=True)
+class TechnicianLocationTests(TestCase):
+    """Posizioni GPS: buffer in cache, salvataggio a lotti e scrittura diretta senza buffer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='pw')
+        company = Company.objects.create(
+            name='Acme', address='Via Roma 1', phone='+390612345678', email='info@acme.it', owner=owner
+        )
+        user = User.objects.create_user('tech', password='pw')
+        cls.technician = Technician.objects.create(user=user, company=company, phone='+390612345700')
+
+    def setUp(self):
+        cache.clear()
+        _dispatch_indexes.clear()
+
+    def saved_position(self):
+        return Technician.objects.values_list('current_latitude', 'current_longitude').get(pk=self.technician.pk)
+
+    def test_buffered_ping(self):
+        """Nella finestra di LOCATION_FLUSH_SECONDS solo il primo ping scrive sul DB"""
+        self.technician.update_location(41.9, 12.5)
+        with self.assertNumQueries(0):
+            self.technician.update_location(42.0, 12.6)
+        self.assertEqual(self.saved_position(), (41.9, 12.5))
+        self.assertTrue(self.technician.is_online)
+
+    def test_flush_saves_buffered_positions(self):
+        self.technician.update_location(41.9, 12.5)
+        self.technician.update_location(42.0, 12.6)
+        self.assertEqual(Technician.flush_cached_locations(), 1)
+        self.assertEqual(self.saved_position(), (42.0, 12.6))
+        # Le posizioni già salvate non vengono riscritte
+        self.assertEqual(Technician.flush_cached_locations(), 0)
+
+    @override_settings(BUFFER_TECHNICIAN_LOCATIONS=False)
+    def test_unbuffered_ping_writes_through(self):
+        """Senza cache condivisa ogni ping va sul DB e il flush non ha nulla da fare"""
+        self.technician.update_location(41.9, 12.5)
+        self.technician.update_location(42.0, 12.6)
+        self.assertEqual(self.saved_position(), (42.0, 12.6))
+        self.assertIsNone(cache.get(Technician.location_cache_key(self.technician.pk)))
+        self.assertEqual(Technician.flush_cached_locations(), 0)
+
+    def test_dispatch_index_follows_cache_version(self):
+        """L'indice in memoria si ricostruisce quando un altro processo incrementa la versione in cache"""
+        Technician.objects.filter(pk=self.technician.pk).update(current_latitude=41.9, current_longitude=12.5)
+        self.assertIn(self.technician.pk, Technician.dispatch_index(self.technician.company_id).within(41.9, 12.5, 1))
+        # Spostamento salvato senza passare da questo processo (es. flush da un altro worker)
+        Technician.objects.filter(pk=self.technician.pk).update(current_latitude=45.4, current_longitude=9.2)
+        self.assertIn(self.technician.pk, Technician.dispatch_index(self.technician.company_id).within(41.9, 12.5, 1))
+        Technician.invalidate_dispatch_index(self.technician.company_id)
+        self.assertNotIn(self.technician.pk, Technician.dispatch_index(self.technician.company_id).within(41.9, 12.5, 1))
+
+    def test_dispatch_index_uses_buffered_positions(self):
+        self.technician.update_location(41.9, 12.5)
+        self.technician.update_location(45.4, 9.2)
+        _dispatch_indexes.clear()  # Come un processo che costruisce l'indice da zero
+        distances = Technician.dispatch_index(self.technician.company_id).within(45.4, 9.2, 1)
+        self.assertIn(self.technician.pk, distances)
+
+
+class TechnicianDailyStatsTests(TestCase):
+    """Il riepilogo giornaliero deve dare gli stessi totali dell'aggregazione diretta sugli ordini"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='pw')
+        cls.company = Company.objects.create(
+            name='Acme', address='Via Roma 1', phone='+390612345678', email='info@acme.it', owner=owner
+        )
+        cls.service_type = ServiceType.objects.create(company=cls.company, name='Riparazione')
+        cls.customer = Customer.objects.create(company=cls.company, name='Cliente', phone='+390612345600', address='Via 1')
+        cls.technicians = [
+            Technician.objects.create(
+                user=User.objects.create_user(f'tech{i}', password='pw'), company=cls.company, phone=f'+39061234570{i}'
+            )
+            for i in range(2)
+        ]
+
+    def create_order(self, technician, status, **fields):
+        return WorkOrder.objects.create(
+            company=self.company, customer=self.customer, service_type=self.service_type, technician=technician,
+            title='Ordine', description='Descrizione', status=status, service_address='Via 1', **fields
+        )
+
+    def order_aggregate(self, technician):
+        """Totali calcolati direttamente dagli ordini, come prima del riepilogo"""
+        orders = WorkOrder.objects.filter(technician=technician)
+        return {
+            'total_orders': orders.count(),
+            'completed_orders': orders.filter(status='COMPLETED').count(),
+            'cancelled_orders': orders.filter(status='CANCELLED').count(),
+        }
+
+    def assertRollupMatchesOrders(self):
+        for technician in self.technicians:
+            stats = technician.get_performance_stats()
+            self.assertEqual(
+                {key: stats[key] for key in ('total_orders', 'completed_orders', 'cancelled_orders')},
+                self.order_aggregate(technician)
+            )
+
+    def test_rollup_matches_order_aggregate(self):
+        now = timezone.now()
+        self.create_order(self.technicians[0], 'ASSIGNED')
+        self.create_order(self.technicians[0], 'CANCELLED')
+        self.create_order(
+            self.technicians[0], 'COMPLETED', started_at=now - timezone.timedelta(hours=2), completed_at=now
+        )
+        self.create_order(self.technicians[1], 'ON_SITE')
+        self.assertRollupMatchesOrders()
+        self.assertEqual(self.technicians[0].get_performance_stats()['avg_completion_hours'], 2.0)
+
+    def test_rollup_after_reassignment(self):
+        order = self.create_order(self.technicians[0], 'ASSIGNED')
+        order = WorkOrder.objects.get(pk=order.pk)
+        order.technician = self.technicians[1]
+        order.save()
+        self.assertRollupMatchesOrders()
+        self.assertFalse(self.technicians[0].daily_stats.exists())
+
+        order.status = 'COMPLETED'
+        order.save()
+        self.assertRollupMatchesOrders()
+
+    def test_unrelated_changes_skip_rollup(self):
+        """Modificare note o prezzi non ricalcola il riepilogo"""
+        order = WorkOrder.objects.get(pk=self.create_order(self.technicians[0], 'ASSIGNED').pk)
+        order.technician_notes = 'Citofono rotto'
+        with CaptureQueriesContext(connection) as context:
+            order.save()
+        self.assertFalse(
+            [query['sql'] for query in context.captured_queries if 'techniciandailystats' in query['sql']]
+        )
+
+    def test_backfill_migration(self):
+        self.create_order(self.technicians[0], 'COMPLETED')
+        self.create_order(self.technicians[1], 'CANCELLED')
+        TechnicianDailyStats.objects.all().delete()
+        backfill = import_module('core.migrations.0013_backfill_technician_daily_stats').backfill_daily_stats
+        backfill(apps, None)
+        self.assertRollupMatchesOrders()
+
+
+class WorkOrderNumberTests(TestCase):
+    """Numerazione progressiva degli ordini per azienda e anno"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user('owner', password='pw')
+        cls.company = Company.objects.create(
+            name='Acme', address='Via Roma 1', phone='+390612345678', email='info@acme.it', owner=owner
+        )
+        cls.service_type = ServiceType.objects.create(company=cls.company, name='Riparazione')
+        cls.customer = Customer.objects.create(company=cls.company, name='Cliente', phone='+390612345600', address='Via 1')
+
+    def create_order(self):
+        return WorkOrder.objects.create(
+            company=self.company, customer=self.customer, service_type=self.service_type,
+            title='Ordine', description='Descrizione', service_address='Via 1'
+        )
+
+    def test_sequence_seeded_after_deletes(self):
+        """Senza contatore si riparte dal numero più alto rimasto, non dal conteggio degli ordini"""
+        orders = [self.create_order() for _ in range(3)]
+        prefix = WorkOrder.order_number_prefix(self.company, timezone.now().year)
+        self.assertEqual([order.order_number for order in orders], [f'{prefix}0001', f'{prefix}0002', f'{prefix}0003'])
+
+        orders[0].delete()
+        WorkOrderSequence.objects.all().delete()  # Ordini creati prima del contatore
+        self.assertEqual(self.create_order().order_number, f'{prefix}0004')
+        self.assertEqual(self.create_order().order_number, f'{prefix}0005')
+
+
+class PaginatorCountTests(DispatchDataTestCase):
+    """Il conteggio in cache delle liste paginate segue le modifiche agli ordini"""
+
+    def test_owner_filtered_list_after_delete(self):
+        self.client.login(username='owner', password='pw')
+        url = reverse('core:order_list') + '?status=ASSIGNED'
+        self.assertEqual(self.client.get(url).context['paginator'].count, 2)
+        WorkOrder.objects.filter(status='ASSIGNED').first().delete()
+        self.assertEqual(self.client.get(url).context['paginator'].count, 1)
+
+    def test_technician_list_after_delete_and_update(self):
+        self.client.login(username='tech1', password='pw')
+        url = reverse('core:technician_order_list')
+        technician = self.technicians[1]
+        total = WorkOrder.objects.filter(technician=technician).count()
+        self.assertEqual(self.client.get(url).context['paginator'].count, total)
+
+        WorkOrder.objects.filter(technician=technician).first().delete()
+        self.assertEqual(self.client.get(url).context['paginator'].count, total - 1)
+
+        order = WorkOrder.objects.filter(technician=technician).first()
+        order.technician = self.technicians[0]
+        order.save()
+        self.assertEqual(self.client.get(url).context['paginator'].count, total - 2)
+
+
+@override_settings(SESSION_ROLE_CACHE=True)
+class SessionRoleTests(DispatchDataTestCase):
+    """Il ruolo salvato in sessione segue i cambi di azienda e profilo tecnico"""
+
+    def test_owner_loses_company_mid_session(self):
+        self.client.login(username='owner', password='pw')
+        self.assertEqual(self.client.get(reverse('core:company_settings')).status_code, 200)
+
+        self.company.owner = User.objects.create_user('newowner', password='pw')
+        self.company.save()
+        response = self.client.get(reverse('core:company_settings'))
+        self.assertRedirects(response, reverse('core:technician_dashboard'), fetch_redirect_response=False)
+
+    def test_user_without_role_becomes_technician(self):
+        """Un ruolo mancante non resta in sessione"""
+        user = User.objects.create_user('newtech', password='pw')
+        self.client.login(username='newtech', password='pw')
+        self.assertRedirects(self.client.get(reverse('core:dashboard')), reverse('core:login'), fetch_redirect_response=False)
+        self.assertNotIn('role', self.client.session)
+
+        Technician.objects.create(user=user, company=self.company, phone='+390612345799')
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertRedirects(response, reverse('core:technician_dashboard'), fetch_redirect_response=False)
+
+    def test_technician_removed_mid_session(self):
+        self.client.login(username='tech2', password='pw')
+        self.assertEqual(self.client.get(reverse('core:technician_dashboard')).status_code, 200)
+
+        self.technicians[2].delete()
+        response = self.client.get(reverse('core:dashboard'))
+        self.assertRedirects(response, reverse('core:login'), fetch_redirect_response=False)
+
+    def test_cache_cleared_after_invalidation(self):
+        """Una versione persa dalla cache non riporta in uso il ruolo salvato in sessione"""
+        self.client.login(username='owner', password='pw')
+        self.assertEqual(self.client.get(reverse('core:company_settings')).status_code, 200)
+
+        self.company.owner = User.objects.create_user('newowner', password='pw')
+        self.company.save()
+        cache.clear()
+        response = self.client.get(reverse('core:company_settings'))
+        self.assertRedirects(response, reverse('core:technician_dashboard'), fetch_redirect_response=False)
+
+    @override_settings(SESSION_ROLE_CACHE=False)
+    def test_recomputed_without_shared_cache(self):
+        """Con la cache locale al processo il ruolo si ricalcola a ogni richiesta"""
+        self.client.login(username='owner', password='pw')
+        self.assertEqual(self.client.get(reverse('core:company_settings')).status_code, 200)
+
+        # update() non invia segnali: nessuna invalidazione
+        Company.objects.filter(pk=self.company.pk).update(owner=User.objects.create_user('newowner', password='pw'))
+        response = self.client.get(reverse('core:company_settings'))
+        self.assertRedirects(response, reverse('core:technician_dashboard'), fetch_redirect_response=False)
+
+
+class AnalyticsInvalidationTests(DispatchDataTestCase):
+    """Le analytics in cache si ricalcolano dopo ogni modifica agli ordini"""
+
+    def status_counts(self):
+        return {
+            item['status']: item['count']
+            for item in AnalyticsService(self.company).cached('get_status_distribution')
+        }
+
+    def test_cached_until_order_saved(self):
+        counts = self.status_counts()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.status_counts(), counts)
+
+        order = WorkOrder.objects.get(pk=self.orders[0].pk)
+        order.status = 'CANCELLED'
+        order.save()
+        self.assertEqual(self.status_counts()['Annullato'], counts['Annullato'] + 1)
+        self.assertEqual(self.status_counts()['Da Assegnare'], counts['Da Assegnare'] - 1)
+
+    def test_invalidated_by_assignment_update(self):
+        """L'assegnazione usa QuerySet.update(), che non invia segnali"""
+        counts = self.status_counts()
+        self.client.login(username='owner', password='pw')
+        self.client.get(reverse('core:assign_order', args=[self.orders[0].pk, self.technicians[0].pk]))
+        self.assertEqual(self.status_counts()['Assegnato'], counts['Assegnato'] + 1)
+
+    def test_order_created_invalidates_once(self):
+        self.status_counts()
+        version = cache.get('analytics_v:%s' % self.company.pk)
+        order = self.orders[0]
+        WorkOrder.objects.create(
+            company=self.company, customer=order.customer, service_type=order.service_type,
+            title='Nuovo', description='Descrizione', service_address='Via Nuova'
+        )
+        self.assertEqual(cache.get('analytics_v:%s' % self.company.pk), version + 1)
+
+
+class ParallelAnalyticsTests(TransactionTestCase):
+    """
+    Analytics calcolate in parallelo, ognuna sulla propria connessione:
+    fuori da una transazione di test, perché i thread devono vedere i dati confermati.
+    """
+
+    def setUp(self):
+        cache.clear()
+        owner = User.objects.create_user('owner', password='pw')
+        self.company = Company.objects.create(
+            name='Acme', address='Via Roma 1', phone='+390612345678', email='info@acme.it', owner=owner
+        )
+        service_type = ServiceType.objects.create(company=self.company, name='Riparazione')
+        customer = Customer.objects.create(company=self.company, name='Cliente', phone='+390612345600', address='Via 0')
+        technician = Technician.objects.create(
+            user=User.objects.create_user('tech', password='pw'), company=self.company, phone='+390612345700'
+        )
+        for i, status in enumerate(['PENDING', 'ASSIGNED', 'ON_SITE', 'CANCELLED']):
+            WorkOrder.objects.create(
+                company=self.company, customer=customer, service_type=service_type,
+                technician=technician if status != 'PENDING' else None,
+                title=f'Ordine {i}', description='Descrizione', status=status,
+                priority='URGENT' if i % 2 else 'NORMAL', service_address=f'Via {i}',
+                scheduled_date=timezone.now() + timezone.timedelta(hours=i)
+            )
+
+    def test_threaded_results_match_sequential(self):
+        calls = {
+            name: ANALYTICS_PAGE_CALLS[name]
+            for name in ('overview_stats', 'status_distribution', 'priority_analysis', 'weekly_schedule')
+        }
+        with override_settings(ANALYTICS_PARALLEL=True), mock.patch.object(
+            AnalyticsService, '_compute_in_thread', autospec=True, side_effect=AnalyticsService._compute_in_thread
+        ) as threaded:
+            parallel = AnalyticsService(self.company).cached_many(calls)
+        self.assertEqual(threaded.call_count, len(calls))
+
+        cache.clear()
+        with override_settings(ANALYTICS_PARALLEL=False):
+            self.assertEqual(AnalyticsService(self.company).cached_many(calls), parallel)
+
+
+class CompanyCountsTests(DispatchDataTestCase):
+    """I conteggi dell'azienda si invalidano con la versione in cache, senza scrivere sulla riga dell'azienda"""
+
+    def test_invalidated_by_new_record(self):
+        counts = self.company.cached_counts()
+        self.assertEqual(counts['customers_count'], 3)
+        with CaptureQueriesContext(connection) as context:
+            Customer.objects.create(company=self.company, name='Nuovo', phone='+390612345699', address='Via 9')
+        self.assertFalse([q for q in context.captured_queries if 'UPDATE "core_company"' in q['sql']])
+        self.assertEqual(self.company.cached_counts()['customers_count'], 4)
+
+
+class MapMarkersTests(DispatchDataTestCase):
+    """La mappa segnala quando MAP_ORDERS_LIMIT esclude degli ordini"""
+
+    def test_truncated_orders_reported(self):
+        self.client.login(username='owner', password='pw')
+        open_orders = WorkOrder.objects.filter(company=self.company, status__in=['PENDING', 'ASSIGNED']).count()
+
+        data = self.client.get(reverse('core:map_data_api')).json()
+        self.assertEqual((len(data['orders']), data['orders_total'], data['orders_truncated']), (open_orders, open_orders, False))
+
+        cache.clear()
+        with mock.patch('core.map_data.MAP_ORDERS_LIMIT', 2):
+            data = self.client.get(reverse('core:map_data_api')).json()
+            response = self.client.get(reverse('core:live_map'))
+        self.assertEqual((len(data['orders']), data['orders_total'], data['orders_truncated']), (2, open_orders, True))
+        self.assertEqual((response.context['orders_total'], response.context['orders_truncated']), (open_orders, True))
+
+
+class SpatialIndexTests(SimpleTestCase):
+    """Il dispatch ordina i tecnici con l'approssimazione equirettangolare, con o senza BallTree"""
+
+    def test_distances_use_cheap_ruler(self):
+        latitudes, longitudes = [41.90, 41.95, 41.80, 45.46], [12.50, 12.45, 12.60, 9.19]
+        index = SpatialIndex([1, 2, 3, 4], latitudes, longitudes)
+        expected = dict(zip([1, 2, 3, 4], map(float, bulk_cheap_distance_km(41.9, 12.49, latitudes, longitudes))))
+
+        within = index.within(41.9, 12.49, 50)
+        self.assertEqual(set(within), {1, 2, 3})
+        for point_id, km in within.items():
+            self.assertAlmostEqual(km, expected[point_id])
+        self.assertEqual(index.nearest(41.9, 12.49, k=2), sorted(expected.items(), key=lambda item: item[1])[:2])
 
-# Create your tests here.
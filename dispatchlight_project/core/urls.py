@@ -1 +1,109 @@
-# core/urls.py - SOSTITUISCI COMPLETAMENTE IL FILE ESISTENTE - URLs con sistema di autorizzazionifrom django.urls import pathfrom . import viewsfrom . import technician_viewsfrom .api_views import (    LiveMapDataView,    AssignOrderView,     UpdateTechnicianLocationView,     MapStatsView,     NearbyTechniciansView,    BulkAssignOrdersView,    OptimizeRoutesView)app_name = 'core'urlpatterns = [    # ============================================================================    # LANDING E REGISTRAZIONE (Pubbliche)    # ============================================================================    path('', views.LandingPageView.as_view(), name='landing'),    path('register/', views.CompanyRegistrationView.as_view(), name='company_registration'),    path('welcome/', views.RegistrationSuccessView.as_view(), name='registration_success'),        # ============================================================================    # AUTENTICAZIONE    # ============================================================================    path('login/', views.CustomLoginView.as_view(), name='login'),    path('logout/', views.CustomLogoutView.as_view(), name='logout'),        # ============================================================================    # DASHBOARD PROPRIETARIO (Solo proprietari)    # ============================================================================    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),    path('onboarding/', views.CompanyOnboardingView.as_view(), name='company_onboarding'),        # ============================================================================    # DASHBOARD TECNICO (Solo tecnici)    # ============================================================================    path('technician/dashboard/', technician_views.TechnicianDashboardView.as_view(), name='technician_dashboard'),    path('technician/orders/', technician_views.TechnicianOrderListView.as_view(), name='technician_order_list'),    path('technician/orders/<uuid:pk>/', technician_views.TechnicianOrderDetailView.as_view(), name='technician_order_detail'),    path('technician/orders/<uuid:pk>/update/', technician_views.TechnicianOrderUpdateView.as_view(), name='technician_order_update'),    path('technician/stats/', technician_views.TechnicianStatsView.as_view(), name='technician_stats'),    path('technician/profile/', technician_views.TechnicianProfileView.as_view(), name='technician_profile'),    path('technician/upcoming/', technician_views.TechnicianUpcomingOrdersView.as_view(), name='technician_upcoming_orders'),        # ============================================================================    # ANALYTICS E REPORT (Solo proprietari)    # ============================================================================    path('analytics/', views.AnalyticsView.as_view(), name='analytics'),    path('reports/', views.ReportsView.as_view(), name='reports'),        # ============================================================================    # PROFILO UTENTE E AZIENDA (Tutti gli utenti autenticati)    # ============================================================================    path('profile/', views.UserProfileView.as_view(), name='user_profile'),    path('profile/edit/', views.UserProfileEditView.as_view(), name='user_profile_edit'),        # ============================================================================    # GESTIONE AZIENDA (Solo proprietari)    # ============================================================================    path('company/edit/', views.CompanyEditView.as_view(), name='company_edit'),    path('settings/', views.CompanySettingsView.as_view(), name='company_settings'),        # ============================================================================    # GESTIONE ORDINI (Proprietari: tutti gli ordini, Tecnici: solo i propri)    # ============================================================================    path('orders/', views.OrderListView.as_view(), name='order_list'),    path('orders/<uuid:pk>/', views.OrderDetailView.as_view(), name='order_detail'),        # Solo proprietari possono creare e modificare ordini    path('orders/create/', views.OrderCreateView.as_view(), name='order_create'),    path('orders/<uuid:pk>/edit/', views.OrderUpdateView.as_view(), name='order_edit'),    path('orders/<uuid:pk>/assign/<int:technician_id>/', views.assign_order, name='assign_order'),        # ============================================================================    # GESTIONE CLIENTI (Solo proprietari)    # ============================================================================    path('customers/', views.CustomerListView.as_view(), name='customer_list'),    path('customers/create/', views.CustomerCreateView.as_view(), name='customer_create'),    path('customers/<int:pk>/', views.CustomerDetailView.as_view(), name='customer_detail'),    path('customers/<int:pk>/edit/', views.CustomerUpdateView.as_view(), name='customer_edit'),        # ============================================================================    # GESTIONE TECNICI (Solo proprietari)    # ============================================================================    path('technicians/', views.TechnicianListView.as_view(), name='technician_list'),    path('technicians/create/', views.TechnicianCreateView.as_view(), name='technician_create'),    path('technicians/<int:pk>/', views.TechnicianDetailView.as_view(), name='technician_detail'),    path('technicians/<int:pk>/edit/', views.TechnicianUpdateView.as_view(), name='technician_edit'),    path('technicians/<int:pk>/locate/', views.technician_locate, name='technician_locate'),        # ============================================================================    # MAPPA LIVE (Solo proprietari)    # ============================================================================    path('map/', views.LiveMapView.as_view(), name='live_map'),        # ============================================================================    # API ENDPOINTS per la mappa (Solo proprietari)    # ============================================================================    path('api/map-data/', LiveMapDataView.as_view(), name='map_data_api'),    path('api/assign-order/', AssignOrderView.as_view(), name='api_assign_order'),    path('api/update-location/', UpdateTechnicianLocationView.as_view(), name='api_update_location'),    path('api/map-stats/', MapStatsView.as_view(), name='api_map_stats'),    path('api/nearby-technicians/', NearbyTechniciansView.as_view(), name='api_nearby_technicians'),    path('api/bulk-assign/', BulkAssignOrdersView.as_view(), name='api_bulk_assign'),    path('api/optimize-routes/', OptimizeRoutesView.as_view(), name='api_optimize_routes'),]
\ No newline at end of file
+# core/urls.py - SOSTITUISCI COMPLETAMENTE IL FILE ESISTENTE - URLs con sistema di autorizzazioni
+from django.urls import path
+from . import views
+from . import technician_views
+from .api_views import (
+    LiveMapDataView,
+    AssignOrderView, 
+    UpdateTechnicianLocationView, 
+    MapStatsView, 
+    NearbyTechniciansView,
+    BulkAssignOrdersView,
+    OptimizeRoutesView
+)
+
+app_name = 'core'
+
+urlpatterns = [
+    # ============================================================================
+    # LANDING E REGISTRAZIONE (Pubbliche)
+    # ============================================================================
+    path('', views.LandingPageView.as_view(), name='landing'),
+    path('register/', views.CompanyRegistrationView.as_view(), name='company_registration'),
+    path('welcome/', views.RegistrationSuccessView.as_view(), name='registration_success'),
+    
+    # ============================================================================
+    # AUTENTICAZIONE
+    # ============================================================================
+    path('login/', views.CustomLoginView.as_view(), name='login'),
+    path('logout/', views.CustomLogoutView.as_view(), name='logout'),
+    
+    # ============================================================================
+    # DASHBOARD PROPRIETARIO (Solo proprietari)
+    # ============================================================================
+    path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('onboarding/', views.CompanyOnboardingView.as_view(), name='company_onboarding'),
+    
+    # ============================================================================
+    # DASHBOARD TECNICO (Solo tecnici)
+    # ============================================================================
+    path('technician/dashboard/', technician_views.TechnicianDashboardView.as_view(), name='technician_dashboard'),
+    path('technician/orders/', technician_views.TechnicianOrderListView.as_view(), name='technician_order_list'),
+    path('technician/orders/<uuid:pk>/', technician_views.TechnicianOrderDetailView.as_view(), name='technician_order_detail'),
+    path('technician/orders/<uuid:pk>/update/', technician_views.TechnicianOrderUpdateView.as_view(), name='technician_order_update'),
+    path('technician/stats/', technician_views.TechnicianStatsView.as_view(), name='technician_stats'),
+    path('technician/profile/', technician_views.TechnicianProfileView.as_view(), name='technician_profile'),
+    path('technician/upcoming/', technician_views.TechnicianUpcomingOrdersView.as_view(), name='technician_upcoming_orders'),
+    
+    # ============================================================================
+    # ANALYTICS E REPORT (Solo proprietari)
+    # ============================================================================
+    path('analytics/', views.AnalyticsView.as_view(), name='analytics'),
+    path('reports/', views.ReportsView.as_view(), name='reports'),
+    
+    # ============================================================================
+    # PROFILO UTENTE E AZIENDA (Tutti gli utenti autenticati)
+    # ============================================================================
+    path('profile/', views.UserProfileView.as_view(), name='user_profile'),
+    path('profile/edit/', views.UserProfileEditView.as_view(), name='user_profile_edit'),
+    
+    # ============================================================================
+    # GESTIONE AZIENDA (Solo proprietari)
+    # ============================================================================
+    path('company/edit/', views.CompanyEditView.as_view(), name='company_edit'),
+    path('settings/', views.CompanySettingsView.as_view(), name='company_settings'),
+    
+    # ============================================================================
+    # GESTIONE ORDINI (Proprietari: tutti gli ordini, Tecnici: solo i propri)
+    # ============================================================================
+    path('orders/', views.OrderListView.as_view(), name='order_list'),
+    path('orders/<uuid:pk>/', views.OrderDetailView.as_view(), name='order_detail'),
+    
+    # Solo proprietari possono creare e modificare ordini
+    path('orders/create/', views.OrderCreateView.as_view(), name='order_create'),
+    path('orders/<uuid:pk>/edit/', views.OrderUpdateView.as_view(), name='order_edit'),
+    path('orders/<uuid:pk>/assign/<int:technician_id>/', views.assign_order, name='assign_order'),
+    
+    # ============================================================================
+    # GESTIONE CLIENTI (Solo proprietari)
+    # ============================================================================
+    path('customers/', views.CustomerListView.as_view(), name='customer_list'),
+    path('customers/create/', views.CustomerCreateView.as_view(), name='customer_create'),
+    path('customers/<int:pk>/', views.CustomerDetailView.as_view(), name='customer_detail'),
+    path('customers/<int:pk>/edit/', views.CustomerUpdateView.as_view(), name='customer_edit'),
+    
+    # ============================================================================
+    # GESTIONE TECNICI (Solo proprietari)
+    # ============================================================================
+    path('technicians/', views.TechnicianListView.as_view(), name='technician_list'),
+    path('technicians/create/', views.TechnicianCreateView.as_view(), name='technician_create'),
+    path('technicians/<int:pk>/', views.TechnicianDetailView.as_view(), name='technician_detail'),
+    path('technicians/<int:pk>/edit/', views.TechnicianUpdateView.as_view(), name='technician_edit'),
+    path('technicians/<int:pk>/locate/', views.technician_locate, name='technician_locate'),
+    
+    # ============================================================================
+    # MAPPA LIVE (Solo proprietari)
+    # ============================================================================
+    path('map/', views.LiveMapView.as_view(), name='live_map'),
+    
+    # ============================================================================
+    # API ENDPOINTS per la mappa (Solo proprietari)
+    # ============================================================================
+    path('api/map-data/', LiveMapDataView.as_view(), name='map_data_api'),
+    path('api/assign-order/', AssignOrderView.as_view(), name='api_assign_order'),
+    path('api/update-location/', UpdateTechnicianLocationView.as_view(), name='api_update_location'),
+    path('api/map-stats/', MapStatsView.as_view(), name='api_map_stats'),
+    path('api/nearby-technicians/', NearbyTechniciansView.as_view(), name='api_nearby_technicians'),
+    path('api/bulk-assign/', BulkAssignOrdersView.as_view(), name='api_bulk_assign'),
+    path('api/optimize-routes/', OptimizeRoutesView.as_view(), name='api_optimize_routes'),
+]
\ No newline at end of file
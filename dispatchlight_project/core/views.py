@@ -11,12 +11,17 @@ from django.urls import reverse_lazy
 from django.contrib import messages
 from django.http import JsonResponse
 from django.utils import timezone
-from django.db.models import Count, Q, Sum, Avg
+from django.db.models import Count, Q, F, Sum, Avg, OuterRef, Exists, Prefetch, FloatField
+from django.db.models.functions import Cast, NullIf
 from django.db import transaction
 from datetime import datetime, timedelta
-import json 
-from .models import WorkOrder, Customer, Technician, Company, ServiceType, Expense
-from .mixins import CompanyAccessMixin, OwnerRequiredMixin, TechnicianAccessMixin, SmartRedirectMixin
+from .models import (WorkOrder, Customer, Technician, Company, ServiceType, Expense, SubqueryCount,
+                     WORK_ORDER_TEXT_FIELDS)
+from .signals import refresh_order_derived_data
+from .map_data import cached_map_markers_json
+from .pagination import CachedCountPaginator
+from .mixins import (CompanyAccessMixin, OwnerRequiredMixin, TechnicianAccessMixin, SmartRedirectMixin,
+                     get_session_role, get_request_company, ROLE_OWNER, ROLE_TECHNICIAN)
 
 # Importa forms solo se esistono per evitare errori
 try:
@@ -36,7 +41,7 @@ except ImportError:
 
 # Importa analytics solo se esiste per evitare errori
 try:
-    from .analytics import AnalyticsService
+    from .analytics import AnalyticsService, ANALYTICS_PAGE_CALLS, REPORTS_DEFAULT_PERIOD, reports_page_calls
 except ImportError:
     AnalyticsService = None
 
@@ -60,15 +65,11 @@ class CompanyRegistrationView(CreateView):
             
         # Se l'utente è già loggato e ha un'azienda, reindirizza alla dashboard appropriata
         if request.user.is_authenticated:
-            try:
-                company = request.user.owned_companies.first()
-                if company:
-                    return redirect('core:dashboard')
-                # Se è un tecnico
-                technician = Technician.objects.get(user=request.user)
+            role = get_session_role(request)
+            if role == ROLE_OWNER:
+                return redirect('core:dashboard')
+            if role == ROLE_TECHNICIAN:
                 return redirect('core:technician_dashboard')
-            except:
-                pass
         
         user_form = UserRegistrationForm()
         company_form = CompanyRegistrationForm()
@@ -88,6 +89,7 @@ class CompanyRegistrationView(CreateView):
         
         if user_form.is_valid() and company_form.is_valid():
             try:
+                # Nella transazione solo le due scritture: il login (sessione, last_login) resta fuori
                 with transaction.atomic():
                     # Crea l'utente
                     user = user_form.save()
@@ -97,18 +99,19 @@ class CompanyRegistrationView(CreateView):
                     company.owner = user
                     company.save()
                     
-                    # Login automatico
-                    login(request, user)
-                    
-                    messages.success(
-                        request, 
-                        f'Benvenuto {user.get_full_name()}! La tua azienda "{company.name}" è stata registrata con successo.'
-                    )
-                    
-                    return redirect('core:registration_success')
-                    
             except Exception as e:
                 messages.error(request, f'Errore durante la registrazione: {str(e)}')
+            
+            else:
+                # Login automatico
+                login(request, user)
+                
+                messages.success(
+                    request, 
+                    f'Benvenuto {user.get_full_name()}! La tua azienda "{company.name}" è stata registrata con successo.'
+                )
+                
+                return redirect('core:registration_success')
         
         return render(request, self.template_name, {
             'user_form': user_form,
@@ -122,18 +125,18 @@ class RegistrationSuccessView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        try:
-            company = self.request.user.owned_companies.first()
-            context['company'] = company
-            
-            if company:
-                # Verifica cosa manca per completare l'onboarding
-                context['needs_service_types'] = not company.service_types.exists()
-                context['needs_customers'] = not company.customers.exists()
-                context['needs_technicians'] = not company.technicians.exists()
-            
-        except:
-            context['company'] = None
+        # Azienda e verifica di cosa manca per l'onboarding in un'unica query
+        company = self.request.user.owned_companies.annotate(
+            needs_service_types=~Exists(ServiceType.objects.filter(company=OuterRef('pk'))),
+            needs_customers=~Exists(Customer.objects.filter(company=OuterRef('pk'))),
+            needs_technicians=~Exists(Technician.objects.filter(company=OuterRef('pk'))),
+        ).first()
+        context['company'] = company
+        
+        if company:
+            context['needs_service_types'] = company.needs_service_types
+            context['needs_customers'] = company.needs_customers
+            context['needs_technicians'] = company.needs_technicians
         
         return context
 
@@ -144,38 +147,21 @@ class CompanyOnboardingView(OwnerRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        try:
-            company = self.get_user_company()
-            context['company'] = company
-            
-            if company:
-                # Statistiche onboarding
-                context.update({
-                    'service_types_count': company.service_types.count(),
-                    'customers_count': company.customers.count(),
-                    'technicians_count': company.technicians.count(),
-                    'orders_count': company.work_orders.count(),
-                })
-                
-                # Calcola percentuale completamento
-                steps_completed = 0
-                total_steps = 4
-                
-                if company.service_types.exists():
-                    steps_completed += 1
-                if company.customers.exists():
-                    steps_completed += 1
-                if company.technicians.exists():
-                    steps_completed += 1
-                if company.work_orders.exists():
-                    steps_completed += 1
-                
-                context['completion_percentage'] = int((steps_completed / total_steps) * 100)
-                context['steps_completed'] = steps_completed
-                context['total_steps'] = total_steps
+        company = self.get_user_company()
+        context['company'] = company
         
-        except:
-            context['company'] = None
+        if company:
+            # Statistiche onboarding (in cache, invalidate da nuovi record)
+            counts = company.cached_counts()
+            context.update(counts)
+            
+            # Calcola percentuale completamento
+            steps_completed = sum(1 for count in counts.values() if count > 0)
+            total_steps = 4
+            
+            context['completion_percentage'] = int((steps_completed / total_steps) * 100)
+            context['steps_completed'] = steps_completed
+            context['total_steps'] = total_steps
         
         return context
 
@@ -188,21 +174,11 @@ class CustomLoginView(LoginView):
     redirect_authenticated_user = True
     
     def get_success_url(self):
-        # Reindirizzamento intelligente basato sul ruolo
-        user = self.request.user
-        
-        # Se è proprietario di un'azienda
-        if user.owned_companies.exists():
-            return reverse_lazy('core:dashboard')
-        
-        # Se è un tecnico
-        try:
-            technician = Technician.objects.get(user=user)
+        # Reindirizzamento intelligente basato sul ruolo salvato in sessione al login
+        if get_session_role(self.request) == ROLE_TECHNICIAN:
             return reverse_lazy('core:technician_dashboard')
-        except Technician.DoesNotExist:
-            pass
         
-        # Default fallback
+        # Proprietario o default fallback
         return reverse_lazy('core:dashboard')
 
 class CustomLogoutView(LogoutView):
@@ -216,20 +192,19 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     """Dashboard che reindirizza in base al ruolo"""
     
     def dispatch(self, request, *args, **kwargs):
-        # Reindirizzamento automatico in base al ruolo
-        user = request.user
+        # Reindirizzamento automatico in base al ruolo (salvato in sessione al login)
+        role = get_session_role(request)
         
         # Se è proprietario, mostra dashboard proprietario
-        if user.owned_companies.exists():
+        if role == ROLE_OWNER:
             return self._owner_dashboard(request)
         
         # Se è tecnico, reindirizza al dashboard tecnico
-        try:
-            technician = Technician.objects.get(user=user)
+        if role == ROLE_TECHNICIAN:
             return redirect('core:technician_dashboard')
-        except Technician.DoesNotExist:
-            messages.error(request, 'Account non associato a nessuna azienda.')
-            return redirect('core:login')
+        
+        messages.error(request, 'Account non associato a nessuna azienda.')
+        return redirect('core:login')
     
     def _owner_dashboard(self, request):
         """Dashboard per proprietari"""
@@ -242,57 +217,40 @@ class DashboardView(LoginRequiredMixin, TemplateView):
                 return onboarding_redirect
         
         # Ottieni l'azienda dell'utente corrente
-        try:
-            company = request.user.owned_companies.first()
-        except:
-            company = None
+        company = get_request_company(request)
         
         context = {}
         
         if company:
-            # Statistiche dashboard
-            today = timezone.now().date()
+            # Contatori e mini-chart in cache, invalidati dai segnali sugli ordini
+            stats = AnalyticsService(company).cached('get_dashboard_stats')
             
             # Calcola valore medio ordine
-            completed_orders = WorkOrder.objects.filter(
-                company=company,
-                status='COMPLETED',
-                final_price__isnull=False
-            )
-            avg_order_value = completed_orders.aggregate(
-                avg=Avg('final_price')
-            )['avg'] or 0
+            avg_order_value = stats['avg_price']
             
             # Dati reali per il mini-chart degli ultimi 7 giorni
-            last_7_days_data = self._get_last_7_days_orders(company)
+            last_7_days_data = stats['last_7_days']
             
             # Calcola tasso di completamento reale
-            total_orders = WorkOrder.objects.filter(company=company).count()
-            completed_orders_count = WorkOrder.objects.filter(
-                company=company, 
-                status='COMPLETED'
-            ).count()
+            total_orders = stats['total']
+            completed_orders_count = stats['completed']
             completion_rate = (completed_orders_count / total_orders * 100) if total_orders > 0 else 0
             
-            # Calcolo semplificato del tempo medio (assumendo 2-4 ore per ordine completato)
-            avg_hours = 3 if completed_orders_count > 0 else 0
+            # Tempo medio dalla creazione al completamento, calcolato dal DB
+            avg_duration = stats['avg_duration']
+            avg_hours = round(avg_duration.total_seconds() / 3600, 1) if avg_duration else 0
             
             context.update({
                 'company': company,
-                'pending_orders': WorkOrder.objects.filter(
-                    company=company, 
-                    status='PENDING'
-                ).count(),
-                'today_orders': WorkOrder.objects.filter(
-                    company=company,
-                    created_at__date=today
-                ).count(),
-                'active_technicians': Technician.objects.filter(
-                    company=company,
-                    is_active=True
-                ).count(),
+                'pending_orders': stats['pending'],
+                'today_orders': stats['today'],
+                'active_technicians': stats['active_technicians'],
+                # Cliente e tecnico mostrati in ogni riga: caricati nella stessa query, solo le colonne usate
                 'recent_orders': WorkOrder.objects.filter(
                     company=company
+                ).select_related('customer', 'technician__user').only(
+                    'id', 'order_number', 'title', 'status', 'created_at', 'customer__name',
+                    'technician__user__first_name', 'technician__user__last_name'
                 ).order_by('-created_at')[:5],
                 'avg_order_value': avg_order_value,
                 'last_7_days_data': last_7_days_data,
@@ -305,46 +263,21 @@ class DashboardView(LoginRequiredMixin, TemplateView):
     
     def _dashboard_check_onboarding(self, request):
         """Controlla se l'utente ha completato l'onboarding"""
-        try:
-            company = request.user.owned_companies.first()
-            if not company:
-                # L'utente non ha un'azienda, reindirizza alla registrazione
-                messages.info(request, 'Prima di continuare, devi registrare la tua azienda.')
-                return redirect('core:company_registration')
-                
-            # Controlla se l'onboarding è completo
-            has_service_types = company.service_types.exists()
-            has_customers = company.customers.exists()
-            has_technicians = company.technicians.exists()
-            
-            if not (has_service_types or has_customers or has_technicians):
-                # Primo accesso, reindirizza all'onboarding
-                return redirect('core:company_onboarding')
-                
-        except Exception as e:
-            messages.error(request, 'Errore nel caricamento dei dati aziendali.')
-            return redirect('core:company_registration')
-        
-        # Tutto ok, continua alla dashboard normale
-        return None
-    
-    def _get_last_7_days_orders(self, company):
-        """Ottiene il numero di ordini degli ultimi 7 giorni"""
+        company = get_request_company(request)
         if not company:
-            return [0] * 7
+            # L'utente non ha un'azienda, reindirizza alla registrazione
+            messages.info(request, 'Prima di continuare, devi registrare la tua azienda.')
+            return redirect('core:company_registration')
         
-        today = timezone.now().date()
-        orders_data = []
+        # Controlla se l'onboarding è completo
+        counts = company.cached_counts()
         
-        for i in range(6, -1, -1):  # Da 6 giorni fa a oggi
-            target_date = today - timedelta(days=i)
-            orders_count = WorkOrder.objects.filter(
-                company=company,
-                created_at__date=target_date
-            ).count()
-            orders_data.append(orders_count)
+        if not (counts['service_types_count'] or counts['customers_count'] or counts['technicians_count']):
+            # Primo accesso, reindirizza all'onboarding
+            return redirect('core:company_onboarding')
         
-        return orders_data
+        # Tutto ok, continua alla dashboard normale
+        return None
 
 # ============================================================================
 # PROFILO UTENTE E AZIENDA - CON CONTROLLI DI AUTORIZZAZIONE
@@ -366,12 +299,13 @@ class UserProfileView(CompanyAccessMixin, TemplateView):
         context['is_owner'] = self.is_company_owner()
         
         if company:
-            # Statistiche rapide (solo per proprietari)
+            # Statistiche rapide (solo per proprietari), dai conteggi in cache dell'azienda
             if self.is_company_owner():
+                counts = company.cached_counts()
                 context.update({
-                    'total_orders': WorkOrder.objects.filter(company=company).count(),
-                    'total_customers': Customer.objects.filter(company=company).count(),
-                    'total_technicians': Technician.objects.filter(company=company).count(),
+                    'total_orders': counts['orders_count'],
+                    'total_customers': counts['customers_count'],
+                    'total_technicians': counts['technicians_count'],
                     'account_created': self.request.user.date_joined,
                 })
         
@@ -431,15 +365,20 @@ class CompanySettingsView(OwnerRequiredMixin, TemplateView):
         context['company'] = company
         
         if company:
-            # Statistiche per le impostazioni
-            context.update({
-                'service_types_count': company.service_types.count(),
-                'customers_count': company.customers.count(), 
-                'technicians_count': company.technicians.count(),
-                'active_technicians_count': company.technicians.filter(is_active=True).count(),
-                'completed_orders_count': company.work_orders.filter(status='COMPLETED').count(),
-                'total_orders_count': company.work_orders.count(),
-            })
+            # Statistiche per le impostazioni: sei conteggi in un'unica query
+            technicians = Technician.objects.filter(company=OuterRef('pk'))
+            orders = WorkOrder.objects.filter(company=OuterRef('pk'))
+            context.update(Company.objects.filter(pk=company.pk).annotate(
+                service_types_count=SubqueryCount(ServiceType.objects.filter(company=OuterRef('pk')).values('pk')),
+                customers_count=SubqueryCount(Customer.objects.filter(company=OuterRef('pk')).values('pk')),
+                technicians_count=SubqueryCount(technicians.values('pk')),
+                active_technicians_count=SubqueryCount(technicians.filter(is_active=True).values('pk')),
+                completed_orders_count=SubqueryCount(orders.filter(status='COMPLETED').values('pk')),
+                total_orders_count=SubqueryCount(orders.values('pk')),
+            ).values(
+                'service_types_count', 'customers_count', 'technicians_count',
+                'active_technicians_count', 'completed_orders_count', 'total_orders_count'
+            ).get())
         
         return context
 
@@ -462,26 +401,11 @@ class AnalyticsView(OwnerRequiredMixin, TemplateView):
         
         analytics = AnalyticsService(company)
         
-        # Prepara dati per JavaScript (conversione sicura)
-        import json
-        
         try:
-            monthly_performance = analytics.get_monthly_performance()
-            status_distribution = analytics.get_status_distribution()
-            technician_performance = analytics.get_technician_performance()
-            weekly_schedule = analytics.get_weekly_schedule_analysis()
-            
-            context.update({
-                'company': company,
-                'overview_stats': analytics.get_overview_stats(),
-                'monthly_performance': json.dumps(monthly_performance),
-                'technician_performance': technician_performance,
-                'status_distribution': json.dumps(status_distribution),
-                'priority_analysis': analytics.get_priority_analysis(),
-                'financial_summary': analytics.get_financial_summary(),
-                'service_type_analysis': analytics.get_service_type_analysis(),
-                'weekly_schedule': json.dumps(weekly_schedule),
-            })
+            # Risultati in cache per azienda e giorno, i mancanti calcolati in parallelo;
+            # i dati per JavaScript sono conservati già serializzati
+            context['company'] = company
+            context.update(analytics.cached_many(ANALYTICS_PAGE_CALLS))
         except Exception as e:
             context['error'] = f'Errore nel caricamento analytics: {str(e)}'
         
@@ -490,6 +414,7 @@ class AnalyticsView(OwnerRequiredMixin, TemplateView):
 class ReportsView(OwnerRequiredMixin, TemplateView):
     """Pagina dei report dettagliati - SOLO PROPRIETARI"""
     template_name = 'core/reports.html'
+    PERIOD_CHOICES = (7, 30, 90, 365)
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -502,23 +427,16 @@ class ReportsView(OwnerRequiredMixin, TemplateView):
         
         analytics = AnalyticsService(company)
         
-        # Periodo selezionato (default 30 giorni)
-        period_days = int(self.request.GET.get('period', 30))
-        
-        # Prepara dati per JavaScript
-        import json
+        # Periodo selezionato (default 30 giorni); solo i periodi offerti, così le chiavi in cache restano poche
+        period = self.request.GET.get('period', '')
+        period_days = int(period) if period.isdigit() and int(period) in self.PERIOD_CHOICES else REPORTS_DEFAULT_PERIOD
         
         try:
-            monthly_performance = analytics.get_monthly_performance()
-            
             context.update({
                 'company': company,
                 'period_days': period_days,
-                'financial_summary': analytics.get_financial_summary(period_days),
-                'customer_analysis': analytics.get_customer_analysis(),
-                'monthly_performance': json.dumps(monthly_performance),
-                'technician_performance': analytics.get_technician_performance(),
             })
+            context.update(analytics.cached_many(reports_page_calls(period_days)))
         except Exception as e:
             context['error'] = f'Errore nel caricamento report: {str(e)}'
         
@@ -534,33 +452,46 @@ class OrderListView(CompanyAccessMixin, ListView):
     template_name = 'core/order_list.html'
     context_object_name = 'orders'
     paginate_by = 20
+    paginator_class = CachedCountPaginator
     
     def get_queryset(self):
         company = self.get_user_company()
         if not company:
             return WorkOrder.objects.none()
         
-        # Proprietari vedono tutti gli ordini dell'azienda
+        # Proprietari vedono tutti gli ordini dell'azienda, i tecnici solo i propri
         if self.is_company_owner():
-            queryset = WorkOrder.objects.filter(company=company)
+            filters = {'company': company}
         else:
-            # Tecnici vedono solo i propri ordini
             technician = self.get_user_technician()
-            if technician:
-                queryset = WorkOrder.objects.filter(technician=technician)
-            else:
+            if not technician:
                 return WorkOrder.objects.none()
+            filters = {'technician': technician}
         
-        # Filtri
+        # Filtri opzionali, raccolti in un'unica WHERE
         status = self.request.GET.get('status')
         if status:
-            queryset = queryset.filter(status=status)
+            filters['status'] = status
         
         technician_filter = self.request.GET.get('technician')
         if technician_filter and self.is_company_owner():
-            queryset = queryset.filter(technician_id=technician_filter)
+            filters['technician_id'] = technician_filter
         
-        return queryset.order_by('-created_at')
+        # Lista completa dell'azienda: il totale è già nei conteggi in cache
+        self.known_count = company.cached_counts()['orders_count'] if filters.keys() == {'company'} else None
+        self.company_id = company.id
+        
+        # Solo le colonne mostrate nella lista, con cliente e tecnico nella stessa query
+        return WorkOrder.objects.filter(**filters).select_related('customer', 'technician__user').only(
+            'id', 'order_number', 'title', 'status', 'priority', 'created_at', 'customer__name',
+            'technician__user__first_name', 'technician__user__last_name'
+        ).order_by('-created_at')
+    
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        return super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+            known_count=getattr(self, 'known_count', None), company_id=getattr(self, 'company_id', None), **kwargs
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -577,7 +508,7 @@ class OrderListView(CompanyAccessMixin, ListView):
             
             # Solo i proprietari vedono la lista completa dei tecnici
             if self.is_company_owner():
-                context['technicians'] = Technician.objects.filter(company=company, is_active=True)
+                context['technicians'] = company.cached_technician_choices()
         
         return context
 
@@ -621,14 +552,22 @@ class OrderDetailView(CompanyAccessMixin, DetailView):
         
         # Proprietari vedono tutti gli ordini dell'azienda
         if self.is_company_owner():
-            return WorkOrder.objects.filter(company=company)
+            queryset = WorkOrder.objects.filter(company=company)
         else:
             # Tecnici vedono solo i propri ordini
             technician = self.get_user_technician()
             if technician:
-                return WorkOrder.objects.filter(technician=technician)
+                queryset = WorkOrder.objects.filter(technician=technician)
             else:
                 return WorkOrder.objects.none()
+        
+        # Relazioni usate dal template: spese e tecnici del modale di assegnazione
+        return queryset.select_related(
+            'customer', 'service_type', 'technician__user', 'company'
+        ).prefetch_related(
+            'expenses',
+            Prefetch('company__technicians', queryset=Technician.objects.select_related('user')),
+        )
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -664,24 +603,34 @@ class OrderUpdateView(OwnerRequiredMixin, UpdateView):
 def assign_order(request, pk, technician_id):
     """Assegna un ordine a un tecnico - SOLO PROPRIETARI"""
     # Verifica che sia proprietario
-    if not request.user.owned_companies.exists():
+    if get_session_role(request) != ROLE_OWNER:
         messages.error(request, 'Solo il proprietario può assegnare ordini.')
         return redirect('core:order_list')
     
-    company = request.user.owned_companies.first()
+    company = get_request_company(request)
     if not company:
         messages.error(request, 'Errore: nessuna azienda associata.')
         return redirect('core:order_list')
     
-    order = get_object_or_404(WorkOrder, pk=pk, company=company)
-    technician = get_object_or_404(Technician, id=technician_id, company=company)
-    
-    order.technician = technician
-    order.status = 'ASSIGNED'
-    order.assigned_at = timezone.now()
-    order.save()
-    
-    messages.success(request, f'Ordine {order.order_number} assegnato a {technician.user.get_full_name()}')
+    # Solo i campi che servono, poi un UPDATE mirato invece del save() dell'intera riga
+    order = get_object_or_404(
+        WorkOrder.objects.values('order_number', 'technician_id', 'created_at'), pk=pk, company=company
+    )
+    # Del tecnico basta il nome per il messaggio
+    technician = get_object_or_404(
+        Technician.objects.values('id', 'user__first_name', 'user__last_name'), id=technician_id, company=company
+    )
+    
+    WorkOrder.objects.filter(pk=pk, company=company).update(
+        technician_id=technician['id'],
+        status='ASSIGNED',
+        assigned_at=timezone.now()
+    )
+    # update() non invia i segnali: aggiorna a mano i dati derivati
+    refresh_order_derived_data(company.id, order['created_at'], {technician['id'], order['technician_id']})
+    
+    technician_name = f'{technician["user__first_name"]} {technician["user__last_name"]}'.strip()
+    messages.success(request, f'Ordine {order["order_number"]} assegnato a {technician_name}')
     return redirect('core:order_detail', pk=pk)
 
 # ============================================================================
@@ -694,12 +643,24 @@ class CustomerListView(OwnerRequiredMixin, ListView):
     template_name = 'core/customer_list.html'
     context_object_name = 'customers'
     paginate_by = 20
+    paginator_class = CachedCountPaginator
     
     def get_queryset(self):
         company = self.get_user_company()
         if company:
-            return Customer.objects.filter(company=company).order_by('name')
+            # Solo le colonne mostrate nella lista
+            return Customer.objects.filter(company=company).only(
+                'id', 'name', 'phone', 'email', 'address', 'created_at'
+            ).order_by('name')
         return Customer.objects.none()
+    
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        # Il totale dei clienti è già nei conteggi in cache dell'azienda
+        company = self.get_user_company()
+        return super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+            known_count=company.cached_counts()['customers_count'] if company else None, **kwargs
+        )
 
 class CustomerCreateView(OwnerRequiredMixin, CreateView):
     """Creazione clienti - SOLO PROPRIETARI"""
@@ -730,12 +691,19 @@ class CustomerDetailView(OwnerRequiredMixin, DetailView):
     def get_queryset(self):
         company = self.get_user_company()
         if company:
-            return Customer.objects.filter(company=company)
+            # Ultimi 10 ordini precaricati insieme al cliente (prefetch con slice)
+            return Customer.objects.filter(company=company).prefetch_related(Prefetch(
+                'work_orders',
+                queryset=WorkOrder.objects.only(
+                    'id', 'customer_id', 'order_number', 'title', 'status', 'created_at'
+                ).order_by('-created_at')[:10],
+                to_attr='recent_orders'
+            ))
         return Customer.objects.none()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['recent_orders'] = self.object.work_orders.order_by('-created_at')[:10]
+        context['recent_orders'] = self.object.recent_orders
         return context
 
 class CustomerUpdateView(OwnerRequiredMixin, UpdateView):
@@ -765,17 +733,57 @@ class TechnicianListView(OwnerRequiredMixin, ListView):
     model = Technician
     template_name = 'core/technician_list.html'
     context_object_name = 'technicians'
+    paginate_by = 25
+    paginator_class = CachedCountPaginator
     
     def get_queryset(self):
         company = self.get_user_company()
         if company:
+            # Subquery correlata: niente JOIN + GROUP BY su tutte le colonne del tecnico
+            open_orders = WorkOrder.objects.filter(
+                technician=OuterRef('pk')
+            ).exclude(status__in=['COMPLETED', 'CANCELLED']).values('pk')
             return Technician.objects.filter(company=company).annotate(
-                active_orders_count=Count(
-                    'work_orders',
-                    filter=~Q(work_orders__status__in=['COMPLETED', 'CANCELLED'])
-                )
-            ).select_related('user')
+                active_orders_count=SubqueryCount(open_orders)
+            ).select_related('user').only(
+                'id', 'phone', 'vehicle_plate', 'is_active', 'last_location_update',
+                'current_latitude', 'current_longitude',
+                'user__username', 'user__first_name', 'user__last_name'
+            ).order_by('pk')
         return Technician.objects.none()
+    
+    def get_paginator(self, queryset, per_page, orphans=0, allow_empty_first_page=True, **kwargs):
+        # Il totale arriva dal riepilogo: nessun COUNT(*) sulla query annotata
+        return super().get_paginator(
+            queryset, per_page, orphans=orphans, allow_empty_first_page=allow_empty_first_page,
+            known_count=self.summary.get('technicians_total'), **kwargs
+        )
+    
+    def get_context_data(self, **kwargs):
+        # Riepilogo su tutti i tecnici, non solo sulla pagina, in un'unica query
+        self.summary = self._get_summary()
+        context = super().get_context_data(**kwargs)
+        context.update(self.summary)
+        return context
+    
+    def _get_summary(self):
+        company = self.get_user_company()
+        if not company:
+            return {}
+        
+        technicians = Technician.objects.filter(company=OuterRef('pk'))
+        return Company.objects.filter(pk=company.pk).annotate(
+            technicians_total=SubqueryCount(technicians.values('pk')),
+            technicians_active=SubqueryCount(technicians.filter(is_active=True).values('pk')),
+            technicians_with_gps=SubqueryCount(technicians.filter(
+                current_latitude__isnull=False, current_longitude__isnull=False
+            ).values('pk')),
+            technicians_open_orders=SubqueryCount(WorkOrder.objects.filter(
+                company=OuterRef('pk'), technician__isnull=False
+            ).exclude(status__in=['COMPLETED', 'CANCELLED']).values('pk')),
+        ).values(
+            'technicians_total', 'technicians_active', 'technicians_with_gps', 'technicians_open_orders'
+        ).get()
 
 class TechnicianCreateView(OwnerRequiredMixin, CreateView):
     """Creazione tecnico - SOLO PROPRIETARI"""
@@ -802,32 +810,43 @@ class TechnicianDetailView(OwnerRequiredMixin, DetailView):
     model = Technician
     template_name = 'core/technician_detail.html'
     context_object_name = 'technician'
+    active_orders_limit = 50
     
     def get_queryset(self):
         company = self.get_user_company()
         if company:
-            return Technician.objects.filter(company=company)
+            return Technician.objects.filter(company=company).select_related('user')
         return Technician.objects.none()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # Ordini del tecnico
-        context['recent_orders'] = self.object.work_orders.order_by('-created_at')[:10]
-        context['active_orders'] = self.object.work_orders.exclude(
-            status__in=['COMPLETED', 'CANCELLED']
+        # Ordini del tecnico (con il cliente mostrato in ogni riga), valutati una volta sola
+        orders = self.object.work_orders.select_related('customer').defer(
+            *WORK_ORDER_TEXT_FIELDS, 'customer__address', 'customer__notes'
         ).order_by('-created_at')
-        
-        # Statistiche del tecnico
-        total_orders = self.object.work_orders.count()
-        completed_orders = self.object.work_orders.filter(status='COMPLETED').count()
-        completion_rate = (completed_orders / total_orders * 100) if total_orders > 0 else 0
+        context['recent_orders'] = list(orders[:10])
+        # Lista limitata: il totale degli attivi arriva dall'aggregazione
+        context['active_orders'] = list(
+            orders.exclude(status__in=['COMPLETED', 'CANCELLED'])[:self.active_orders_limit]
+        )
+        
+        # Statistiche del tecnico in un'unica aggregazione, percentuale compresa (NULL senza ordini)
+        completed = Count('id', filter=Q(status='COMPLETED'))
+        stats = self.object.work_orders.aggregate(
+            total=Count('id'),
+            completed=completed,
+            pending=Count('id', filter=Q(status='PENDING')),
+            active=Count('id', filter=~Q(status__in=['COMPLETED', 'CANCELLED'])),
+            completion_rate=Cast(completed, FloatField()) * 100 / NullIf(Count('id'), 0),
+        )
         
         context.update({
-            'total_orders': total_orders,
-            'completed_orders': completed_orders,
-            'completion_rate': round(completion_rate, 1),
-            'pending_orders': self.object.work_orders.filter(status='PENDING').count(),
+            'total_orders': stats['total'],
+            'completed_orders': stats['completed'],
+            'completion_rate': round(stats['completion_rate'] or 0, 1),
+            'pending_orders': stats['pending'],
+            'active_orders_count': stats['active'],
         })
         
         return context
@@ -888,16 +907,17 @@ class TechnicianUpdateView(OwnerRequiredMixin, UpdateView):
 def technician_locate(request, pk):
     """Localizza tecnico sulla mappa - SOLO PROPRIETARI"""
     # Verifica che sia proprietario
-    if not request.user.owned_companies.exists():
+    if get_session_role(request) != ROLE_OWNER:
         messages.error(request, 'Solo il proprietario può localizzare i tecnici.')
         return redirect('core:technician_list')
     
-    company = request.user.owned_companies.first()
+    company = get_request_company(request)
     if not company:
         messages.error(request, 'Errore: nessuna azienda associata.')
         return redirect('core:technician_list')
     
-    technician = get_object_or_404(Technician, pk=pk, company=company)
+    # Il nome del tecnico compare nel messaggio: utente caricato nella stessa query
+    technician = get_object_or_404(Technician.objects.select_related('user'), pk=pk, company=company)
     
     # Se il tecnico ha coordinate GPS, reindirizza alla mappa con focus su di lui
     if technician.current_latitude and technician.current_longitude:
@@ -920,133 +940,20 @@ class LiveMapView(OwnerRequiredMixin, TemplateView):
         company = self.get_user_company()
         
         if company:
-            # Prepara dati tecnici per JavaScript
-            technicians_data = []
-            technicians = Technician.objects.filter(
-                company=company, 
-                is_active=True
-            ).select_related('user').annotate(
-                current_orders=Count('work_orders', filter=Q(work_orders__status__in=['ASSIGNED', 'EN_ROUTE', 'ON_SITE']))
-            )
-            
-            for tech in technicians:
-                # Coordinate simulate per demo (sostituire con dati GPS reali)
-                lat, lng = self._get_demo_coordinates(tech.id)
-                
-                technicians_data.append({
-                    'id': tech.id,
-                    'name': tech.user.get_full_name(),
-                    'phone': str(tech.phone),
-                    'vehicle': tech.vehicle_plate,
-                    'is_active': tech.is_active,
-                    'current_orders': tech.current_orders,
-                    'completed_today': self._get_completed_today_count(tech),
-                    'lat': lat,
-                    'lng': lng,
-                    'last_update': tech.last_location_update.isoformat() if tech.last_location_update else None,
-                    'status': tech.get_current_status() if hasattr(tech, 'get_current_status') else 'AVAILABLE'
-                })
-            
-            # Prepara dati ordini per JavaScript
-            orders_data = []
-            orders = WorkOrder.objects.filter(
-                company=company,
-                status__in=['PENDING', 'ASSIGNED']
-            ).select_related('customer', 'technician__user')
-            
-            for order in orders:
-                # Coordinate simulate per demo (sostituire con geocoding dell'indirizzo)
-                lat, lng = self._geocode_address(order.service_address)
-                
-                orders_data.append({
-                    'id': str(order.id),
-                    'order_number': order.order_number,
-                    'title': order.title,
-                    'description': order.description,
-                    'customer_name': order.customer.name,
-                    'customer_phone': str(order.customer.phone),
-                    'priority': order.priority,
-                    'priority_display': order.get_priority_display(),
-                    'status': order.status,
-                    'service_address': order.service_address,
-                    'created_at': order.created_at.isoformat(),
-                    'technician_id': order.technician.id if order.technician else None,
-                    'technician_name': order.technician.user.get_full_name() if order.technician else None,
-                    'lat': lat,
-                    'lng': lng,
-                    'estimated_price': float(order.estimated_price) if order.estimated_price else None
-                })
-            
-            # Informazioni azienda
-            company_data = {
-                'name': company.name,
-                'address': company.address,
-                'phone': str(company.phone),
-                'center_lat': 41.9028,  # Roma come default
-                'center_lng': 12.4964
-            }
-            
+            # Dati di tecnici e ordini per JavaScript (quelli dell'azienda sono scritti dal template)
+            markers = cached_map_markers_json(company)
             context.update({
                 'company': company,
-                'technicians': technicians,
-                'orders': orders,
-                'technicians_json': json.dumps(technicians_data),
-                'orders_json': json.dumps(orders_data),
-                'company_json': json.dumps(company_data),
+                'technicians_json': markers['technicians'],
+                'orders_json': markers['orders'],
+                'orders_total': markers['orders_total'],
+                'orders_truncated': markers['orders_truncated'],
                 'focus_technician': self.request.GET.get('focus_technician'),
             })
         else:
             context.update({
                 'technicians_json': '[]',
                 'orders_json': '[]',
-                'company_json': '{}',
             })
         
-        return context
-    
-    def _get_demo_coordinates(self, tech_id):
-        """
-        Genera coordinate simulate per demo.
-        In produzione, sostituire con tech.current_latitude, tech.current_longitude
-        """
-        # Coordinate simulate intorno a Roma
-        base_lat = 41.9028
-        base_lng = 12.4964
-        
-        # Offset basato sull'ID per posizioni diverse
-        import random
-        random.seed(tech_id)  # Seed fisso per coordinate consistenti
-        
-        lat_offset = random.uniform(-0.1, 0.1)  # ~11km range
-        lng_offset = random.uniform(-0.1, 0.1)
-        
-        return base_lat + lat_offset, base_lng + lng_offset
-    
-    def _geocode_address(self, address):
-        """
-        Geocoding semplificato per demo.
-        In produzione, usare Google Maps Geocoding API o simili
-        """
-        # Coordinate simulate intorno a Roma
-        base_lat = 41.9028
-        base_lng = 12.4964
-        
-        # Hash dell'indirizzo per coordinate consistenti
-        import hashlib
-        hash_obj = hashlib.md5(address.encode())
-        hash_int = int(hash_obj.hexdigest()[:8], 16)
-        
-        # Offset basato sull'hash
-        lat_offset = ((hash_int % 200) - 100) / 1000  # Range ±0.1
-        lng_offset = (((hash_int // 200) % 200) - 100) / 1000
-        
-        return base_lat + lat_offset, base_lng + lng_offset
-    
-    def _get_completed_today_count(self, technician):
-        """Conta ordini completati oggi dal tecnico"""
-        from datetime import date
-        return WorkOrder.objects.filter(
-            technician=technician,
-            status='COMPLETED',
-            completed_at__date=date.today()
-        ).count()
\ No newline at end of file
+        return context
\ No newline at end of file
@@ -36,6 +36,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CompanyContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -53,6 +54,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.user_role',
             ],
         },
     },
@@ -69,6 +71,39 @@ DATABASES = {
     }
 }
 
+# Analytics mancanti calcolate in parallelo, ognuna su una propria connessione:
+# non con SQLite, che serializza comunque gli accessi allo stesso file
+ANALYTICS_PARALLEL = DATABASES['default']['ENGINE'] != 'django.db.backends.sqlite3'
+
+# Cache (posizioni GPS dei tecnici, dati aggregati)
+# Con REDIS_URL la cache è condivisa tra i processi, altrimenti è locale al processo
+REDIS_URL = config('REDIS_URL', default='')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Posizioni GPS in cache e scritte sul DB a lotti: solo con la cache condivisa,
+# perché una cache locale al processo perderebbe le posizioni non salvate.
+# Con il buffer attivo va eseguito periodicamente (es. cron ogni minuto):
+#   python manage.py flush_technician_locations
+BUFFER_TECHNICIAN_LOCATIONS = bool(REDIS_URL)
+
+# Ruolo dell'utente salvato in sessione e validato con una versione in cache: solo con
+# la cache condivisa, perché l'invalidazione deve arrivare a tutti i processi.
+# Senza, il ruolo si ricalcola a ogni richiesta (una query).
+SESSION_ROLE_CACHE = bool(REDIS_URL)
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [